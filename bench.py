@@ -0,0 +1,369 @@
+"""Micro-benchmarks for the hot paths in main143.py.
+
+Measures ops/s and per-call latency (mean / p50 / p99) over a corpus of real
+transcripts (the logs under obs_text, if any) and synthetic radio audio:
+
+    python bench.py run                          # print results
+    python bench.py run --save baseline.json     # keep a baseline
+    python bench.py run --compare baseline.json  # run and flag regressions
+    python bench.py compare baseline.json new.json --threshold 0.15
+    python bench.py run --only "tuner|highlight" --rounds 20
+
+A result regresses when its ops/s falls by more than --threshold (default
+10%) against the baseline; compare exits 1 if anything regressed.
+RadioTuner and PolyphaseResampler results also report the real-time factor
+(audio seconds processed per CPU second); below 1x the DSP cannot keep up
+with capture.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent
+TUNER_BLOCK_SIZES = (160, 320, 1600, 3200)
+HTML_BLOCK_COUNTS = (1, 6, 50, 300)
+CAPTURE_RATES = (44100, 48000)
+SYNTH_AUDIO_SECONDS = 10.0
+
+FALLBACK_CORPUS = [
+    "Adam 12 copy 10-71 at Main and 5th.",
+    "Charles three ten twenty one, radio.",
+    "King 69 CharlesQueenLincoln 024 on our Toyota.",
+    "I'm 10-97 on the 245 PC, suspect is a white male.",
+    "10-28 on plate Adam Boy Charles, 1 2 3.",
+    "Lincoln 4, 1126 at the Parker, 11-99 11-99!",
+    "Copy, show me 10-8.",
+    "Dispatch, Mary 7, can you run a 10-29 on a Nora Ocean Robert Adam.",
+]
+
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+_LOG_LINE = re.compile(r"^(?:\[[^\]]+\] |    )(?!INFO LOOKUP:)(.+)$")
+
+
+def load_corpus(m, limit: int = 2000) -> list[str]:
+    """Transcript lines from the flat logs and segment stores under obs_text."""
+    obs = BASE_DIR / "obs_text"
+    lines: list[str] = []
+    for name in ("full_transcript_log.txt", "caption_log.txt"):
+        path = obs / name
+        if path.exists():
+            lines += path.read_text(encoding="utf-8", errors="replace").splitlines()
+    for name in ("full_transcript_log", "caption_log"):
+        store = m.TranscriptStore(obs / name)
+        lines += [l.rstrip("\n") for l in store.read_range(0.0, time.time())]
+    out = []
+    for line in lines:
+        mt = _LOG_LINE.match(line)
+        if mt:
+            # strip annotations the logger added, so the bench sees raw text
+            out.append(re.sub(r" \([^()]*(?:\([^()]*\)[^()]*)*\)", "", mt.group(1)).strip())
+    out = [l for l in out if l]
+    return (out or FALLBACK_CORPUS)[:limit]
+
+
+def synth_radio_audio(sr: int, seconds: float, seed: int = 0) -> np.ndarray:
+    """Bursts of band-limited 'speech' (AM-modulated noise + formant tones)
+    between stretches of squelch hiss, float32 in [-1, 1]."""
+    rng = np.random.default_rng(seed)
+    n = int(sr * seconds)
+    t = np.arange(n) / sr
+    hiss = rng.normal(0.0, 0.003, n)
+    voice = rng.normal(0.0, 0.15, n) * (0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t))
+    voice += 0.2 * np.sin(2 * np.pi * 600 * t) + 0.1 * np.sin(2 * np.pi * 1700 * t)
+    keyed = (np.sin(2 * np.pi * 0.2 * t) > -0.2)  # ~60% talk, ~40% silence
+    return np.clip(hiss + keyed * voice, -1.0, 1.0).astype(np.float32)
+
+
+def deepgram_messages(corpus: list[str], words: bool = False) -> list[dict]:
+    msgs = []
+    for i, text in enumerate(corpus):
+        alt = {"transcript": text, "confidence": 0.9}
+        if words:
+            toks = text.split()
+            step = 1.5 / max(1, len(toks))
+            alt["words"] = [
+                {"word": t.lower().strip(".,!?"), "start": i * 1.5 + k * step,
+                 "end": i * 1.5 + (k + 1) * step, "confidence": 0.9, "punctuated_word": t}
+                for k, t in enumerate(toks)
+            ]
+        msgs.append({
+            "type": "Results",
+            "is_final": i % 3 == 0,
+            "speech_final": False,
+            "start": i * 1.5,
+            "duration": 1.5,
+            "channel": {"alternatives": [alt]},
+        })
+    return msgs
+
+
+def deepgram_stream(corpus: list[str]) -> list[str]:
+    """Raw websocket text as a live stream sends it: Results with words,
+    plus SpeechStarted / UtteranceEnd around them and a Metadata."""
+    out = [json.dumps({"type": "Metadata", "request_id": "bench", "duration": 0.0})]
+    for i, msg in enumerate(deepgram_messages(corpus, words=True)):
+        if i % 3 == 1:
+            out.append(json.dumps({"type": "SpeechStarted", "channel": [0], "timestamp": msg["start"]}))
+        out.append(json.dumps(msg))
+        if msg["is_final"]:
+            out.append(json.dumps({"type": "UtteranceEnd", "channel": [0, 1], "last_word_end": msg["start"]}))
+    return out
+
+
+# =============================================================================
+# TIMING
+# =============================================================================
+def measure(fn, args: list, rounds: int, before_round=None) -> dict:
+    """Call fn(arg) for every arg, `rounds` times; per-call latency stats."""
+    lat = np.empty(len(args) * rounds, dtype=np.int64)
+    k = 0
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        if before_round is not None:
+            before_round()
+        for a in args:
+            t0 = clock()
+            fn(a)
+            lat[k] = clock() - t0
+            k += 1
+    total_s = lat.sum() / 1e9
+    return {
+        "calls": int(k),
+        "ops_per_s": k / total_s if total_s > 0 else float("inf"),
+        "mean_us": float(lat.mean() / 1e3),
+        "p50_us": float(np.percentile(lat, 50) / 1e3),
+        "p99_us": float(np.percentile(lat, 99) / 1e3),
+    }
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+def bench_tuner(m, rounds: int) -> dict:
+    audio = synth_radio_audio(m.SAMPLE_RATE, SYNTH_AUDIO_SECONDS)
+    out = {}
+    for bs in TUNER_BLOCK_SIZES:
+        blocks = [audio[i:i + bs] for i in range(0, len(audio) - bs + 1, bs)]
+        tuner = m.RadioTuner(m.SAMPLE_RATE)
+        r = measure(tuner.process, blocks, max(1, rounds // 5))
+        r["realtime_x"] = r["ops_per_s"] * bs / m.SAMPLE_RATE
+        out[f"RadioTuner.process[{bs}]"] = r
+        # the DSP_INPLACE path: scratch refill + in-place chain + int16 pool
+        tuner = m.RadioTuner(m.SAMPLE_RATE)
+        pool = m.PCM16Pool(m.pcm16_pool_frames())
+        work = np.empty(bs, dtype=np.float32)
+
+        def inplace(block):
+            np.copyto(work, block)
+            m.block_to_pcm16_inplace(tuner, work, pool)
+
+        r = measure(inplace, blocks, max(1, rounds // 5))
+        r["realtime_x"] = r["ops_per_s"] * bs / m.SAMPLE_RATE
+        out[f"block_to_pcm16_inplace[{bs}]"] = r
+    return out
+
+
+def bench_resampler(m, rounds: int) -> dict:
+    """Native capture rate -> SAMPLE_RATE in AUDIO_BLOCKSIZE-long (20 ms)
+    blocks, alone and followed by the tuner with its low-pass fused away."""
+    out = {}
+    for rate in CAPTURE_RATES:
+        audio = synth_radio_audio(rate, SYNTH_AUDIO_SECONDS)
+        bs = m.AUDIO_BLOCKSIZE * rate // m.SAMPLE_RATE
+        blocks = [audio[i:i + bs] for i in range(0, len(audio) - bs + 1, bs)]
+        r = measure(m.PolyphaseResampler(rate, m.SAMPLE_RATE, m.resample_cutoff_hz()).process,
+                    blocks, max(1, rounds // 5))
+        r["realtime_x"] = r["ops_per_s"] * bs / rate
+        out[f"PolyphaseResampler.process[{rate}]"] = r
+        resampler = m.PolyphaseResampler(rate, m.SAMPLE_RATE, m.resample_cutoff_hz())
+        tuner = m.RadioTuner(m.SAMPLE_RATE, fused_low_pass=True)
+        r = measure(lambda x: tuner.process(resampler.process(x)), blocks, max(1, rounds // 5))
+        r["realtime_x"] = r["ops_per_s"] * bs / rate
+        out[f"resample+RadioTuner[{rate}]"] = r
+    return out
+
+
+def bench_text(m, corpus: list[str], rounds: int) -> dict:
+    out = {}
+    # cold = cache cleared before every pass, warm = repeated lines hit the LRU
+    out["highlight_to_html[cold]"] = measure(
+        m.highlight_to_html, corpus, rounds, before_round=m.highlight_cache.clear
+    )
+    out["highlight_to_html[warm]"] = measure(m.highlight_to_html, corpus, rounds)
+    out["process_transcript[cold]"] = measure(
+        m.process_transcript, corpus, rounds, before_round=m.process_cache.clear
+    )
+    decoder = m.InfoLookupDecoder()
+    now = [time.time()]
+
+    def decode(text):
+        now[0] += 1.0
+        decoder.process_final(text, now[0])
+
+    out["InfoLookupDecoder.process_final"] = measure(decode, corpus, rounds)
+    # the receive path: pre-split Deepgram words with audio timestamps
+    decoder = m.InfoLookupDecoder()
+    word_lists = [m.lookup_words(None, text, 1.5 * i) for i, text in enumerate(corpus)]
+    out["InfoLookupDecoder.process_words"] = measure(decoder.process_words, word_lists, rounds)
+    return out
+
+
+def bench_receive(m, corpus: list[str], out_dir: Path, rounds: int) -> dict:
+    """Messages/s through one channel's receive path, per JSON backend:
+    decode_message alone, then handle_message (captions, logs, decoder)
+    on a fresh channel each, so log/HTML growth does not favour either."""
+    out = {}
+    stream = deepgram_stream(corpus)
+    saved = m.json_loads
+    backends = ["json"] + (["orjson"] if m.orjson is not None else [])
+    try:
+        for name in backends:
+            m.json_loads = m.select_json_loads(name)
+            ch = m.Channel(f"bench-{name}", out_dir / f"receive_{name}")
+            out[f"decode_message[{name}]"] = measure(m.decode_message, stream, rounds)
+            # captions are printed per message; keep them out of the table and the timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                out[f"handle_message[{name}]"] = measure(
+                    lambda msg: m.handle_message(ch, msg, time.monotonic()), stream, rounds,
+                    before_round=m.process_cache.clear,
+                )
+            ch.close_outputs()
+    finally:
+        m.json_loads = saved
+    return out
+
+
+def bench_write_html(m, corpus: list[str], out_dir: Path, rounds: int) -> dict:
+    out = {}
+    store = m.TranscriptStore(out_dir / "bench_log", m.log_appender)
+    for n in HTML_BLOCK_COUNTS:
+        logger = m.FullTranscriptLogger(store, out_dir / f"bench_{n}.html", 4.0)
+        logger.closed_fragments = deque(maxlen=max(0, n - 1))
+        for i in range(n):
+            logger.last_write_time = None  # force a new block per entry
+            logger.add_entry(corpus[i % len(corpus)])
+        fragment = logger.blocks[-1].render("new")
+        out[f"FullTranscriptLogger._write_html[{n}]"] = measure(
+            logger._write_html, [fragment] * 50, rounds
+        )
+    store.close()
+    return out
+
+
+def run_all(rounds: int, only: str | None) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="pscanner-bench-"))
+    # main143 writes its outputs at import time; keep them out of obs_text
+    os.environ["PSCANNER_OBS_DIR"] = str(tmp)
+    import main143 as m
+
+    corpus = load_corpus(m)
+    results = {}
+    results.update(bench_tuner(m, rounds))
+    results.update(bench_resampler(m, rounds))
+    results.update(bench_text(m, corpus, rounds))
+    results.update(bench_write_html(m, corpus, tmp, rounds))
+    results.update(bench_receive(m, corpus, tmp, rounds))
+    if only:
+        results = {k: v for k, v in results.items() if re.search(only, k)}
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()}",
+            "filter_backend": m.get_filter_backend().name,
+            "json_backend": m.json_loads.__module__,
+            "corpus_lines": len(corpus),
+            "rounds": rounds,
+            "only": only,
+        },
+        "results": results,
+    }
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+def print_results(report: dict) -> None:
+    meta = report["meta"]
+    print(f"# {meta['date']}  python {meta['python']}  numpy {meta['numpy']}  "
+          f"{meta['machine']}  dsp={meta['filter_backend']}  corpus={meta['corpus_lines']} lines")
+    print(f"{'benchmark':45s} {'ops/s':>12s} {'mean us':>10s} {'p50 us':>10s} {'p99 us':>10s}")
+    for name, r in report["results"].items():
+        extra = f"  {r['realtime_x']:.0f}x real time" if "realtime_x" in r else ""
+        print(f"{name:45s} {r['ops_per_s']:12.0f} {r['mean_us']:10.1f} "
+              f"{r['p50_us']:10.1f} {r['p99_us']:10.1f}{extra}")
+
+
+def compare(base: dict, new: dict, threshold: float) -> bool:
+    """Print the ops/s change per benchmark; True if anything regressed."""
+    regressed = False
+    print(f"{'benchmark':45s} {'base ops/s':>12s} {'new ops/s':>12s} {'change':>8s}")
+    for name, r in new["results"].items():
+        b = base["results"].get(name)
+        if b is None:
+            print(f"{name:45s} {'-':>12s} {r['ops_per_s']:12.0f}      new")
+            continue
+        change = r["ops_per_s"] / b["ops_per_s"] - 1.0
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        elif change > threshold:
+            flag = "  faster"
+        print(f"{name:45s} {b['ops_per_s']:12.0f} {r['ops_per_s']:12.0f} {change:+7.1%}{flag}")
+        if "realtime_x" in r and r["realtime_x"] < 1.0:
+            print(f"{'':45s} below real time ({r['realtime_x']:.2f}x)")
+            regressed = True
+    if not new["meta"].get("only"):
+        for name in sorted(base["results"].keys() - new["results"].keys()):
+            print(f"{name:45s} missing from new results")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the main143 hot paths")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("run", help="run the benchmarks")
+    rp.add_argument("--rounds", type=int, default=10)
+    rp.add_argument("--only", help="regex of benchmark names to keep")
+    rp.add_argument("--save", type=Path, help="write results as JSON")
+    rp.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    rp.add_argument("--threshold", type=float, default=0.10)
+    cp = sub.add_parser("compare", help="compare two saved result files")
+    cp.add_argument("base", type=Path)
+    cp.add_argument("new", type=Path)
+    cp.add_argument("--threshold", type=float, default=0.10)
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        report = run_all(args.rounds, args.only)
+        print_results(report)
+        if args.save:
+            args.save.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            print(f"Saved {args.save}")
+        if args.compare:
+            base = json.loads(args.compare.read_text(encoding="utf-8"))
+            sys.exit(1 if compare(base, report, args.threshold) else 0)
+    else:
+        base = json.loads(args.base.read_text(encoding="utf-8"))
+        new = json.loads(args.new.read_text(encoding="utf-8"))
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
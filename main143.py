@@ -1,17 +1,62 @@
 import os
 import asyncio
+import atexit
+import contextlib
 import json
-import queue
+import threading
 import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
 from pathlib import Path
+from typing import NamedTuple
 import re
+import signal
+import sys
 import html as htmlmod
 from urllib.parse import quote
 
 import numpy as np
-import sounddevice as sd
 import websockets
 
+# PortAudio is only needed for live capture; replay.py runs without it
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    sd = None
+
+from transcript_index import TranscriptIndex
+from transcript_store import TranscriptStore
+
+# Optional DSP accelerators (the pure-Python filter loops always work)
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional faster JSON parser for the receive path (JSON_BACKEND)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional OBS browser-source refresh (OBS_REFRESH_ENABLED)
+try:
+    import obsws_python
+except ImportError:
+    obsws_python = None
+
+# Optional compressed uplink (UPLINK_ENCODING "opus" / "flac")
+try:
+    import av
+except ImportError:
+    av = None
+
 # =============================================================================
 # CONFIG
 # =============================================================================
@@ -27,14 +72,49 @@ DEEPGRAM_KEY = "4ac21a8943641cc4151b3955ace862c7868d708e"
 SAMPLE_RATE = 16000
 CHANNELS = 1
 ENDPOINTING_MS = 1000
+AUDIO_BLOCKSIZE = 320  # frames per PortAudio callback (20 ms @ 16 kHz)
+
+# Coalesce queued audio into one websocket frame per window (ms).
+SEND_COALESCE_MS = 100
+UPLINK_STATS_SECONDS = 60.0  # periodic uplink/latency summary; 0 disables
+
+# Uplink encoding: "linear16" (raw PCM), "opus" or "flac" (needs PyAV: pip install av)
+UPLINK_ENCODING = "linear16"  # "linear16" | "opus" | "flac"
+UPLINK_OPUS_BITRATE = 24000
+
+# Max audio waiting for the websocket (0 = unbounded)
+AUDIO_QUEUE_MAX_MS = 3000
+AUDIO_QUEUE_POLICY = "speech_only"  # "drop_oldest" | "drop_newest" | "speech_only"
+
+# Voice-activity gate: skip silence, pre-roll on speech (keep hangover >= ENDPOINTING_MS)
+VAD_ENABLED = True
+VAD_RMS = 0.006          # raw input RMS that counts as voice (cf. GATE_RMS)
+VAD_HANGOVER_MS = 1500   # keep sending this long after the last voiced block
+VAD_PREROLL_MS = 300     # audio from just before the onset, sent when it opens
+
+# -------------------------
+# Connection supervision
+# -------------------------
+RECONNECT_BACKOFF_INITIAL = 0.5
+RECONNECT_BACKOFF_MAX = 30.0
+KEEPALIVE_SECONDS = 5.0       # send KeepAlive when no audio went out for this long
+REPLAY_SECONDS = 5.0          # resend up to this much un-finalized audio on reconnect
+DEDUPE_GRACE_SECONDS = 10.0   # after a replay, how long untimed results are checked against recent finals
+
+# Scanners: one entry per audio device + Deepgram stream
+#   keys: name, device, out_dir, keyterms, obs_source
+SCANNERS = [
+    {"name": "scanner", "device": None},
+]
+
+# Trace recording for replay.py (to TRACE_DIR)
+RECORD_TRACE = False
+RECORD_TRACE_PCM = True
 
 DG_BASE_URL = (
     "wss://api.deepgram.com/v1/listen"
     f"?model=nova-3"
     f"&language=en-US"
-    f"&encoding=linear16"
-    f"&sample_rate={SAMPLE_RATE}"
-    f"&channels={CHANNELS}"
     f"&smart_format=true"
     f"&numerals=true"
     f"&interim_results=true"
@@ -58,22 +138,28 @@ KEYTERMS = [
     "eleven twenty five",
 ]
 
-def build_dg_url() -> str:
+def build_dg_url(extra_keyterms=(), encoding="linear16") -> str:
+    encoding = effective_uplink_encoding(encoding)
     parts = [DG_BASE_URL]
-    for k in KEYTERMS:
+    if encoding == "linear16":
+        # only raw PCM needs its format spelled out
+        parts.append(f"&encoding=linear16&sample_rate={SAMPLE_RATE}&channels={CHANNELS}")
+    for k in [*KEYTERMS, *extra_keyterms]:
         parts.append("&keyterm=" + quote(k))
     return "".join(parts)
 
-DG_URL = build_dg_url()
-
-audio_q: "queue.Queue[bytes]" = queue.Queue()
-
 # -------------------------
 # Logging fallback when finals never arrive
 # -------------------------
 FORCE_LOG_AFTER_SECONDS = 6.0
 FORCE_LOG_MIN_INTERVAL = 4.0
 
+# Max interims post-processed per second (latest wins; finals are immediate)
+INTERIM_MAX_HZ = 5.0
+
+# JSON parser: "auto" (orjson if installed), "orjson" or "json"
+JSON_BACKEND = "auto"
+
 # =============================================================================
 # CB / radio-style tuning (ASR-safe defaults)
 # =============================================================================
@@ -98,24 +184,57 @@ SOFTCLIP_ENABLED = False
 PREEMPH_ENABLED = True
 PREEMPH = 0.85
 
+# Filter engine: "auto" (fastest at startup), "numba", "lfilter" or "python"
+FILTER_BACKEND = "auto"
+FILTER_BENCH_ROUNDS = 50
+
+# Capture mode: "direct" (DSP in the callback) or "ring" (DSP worker thread)
+CAPTURE_MODE = "ring"
+RING_SECONDS = 2.0
+DSP_BATCH_FRAMES = 1600  # 100 ms @ 16 kHz; independent of AUDIO_BLOCKSIZE
+
+# Capture rate: None (device at SAMPLE_RATE), "native" (resample here) or a number
+CAPTURE_RATE = None
+RESAMPLE_TAPS = 64          # FIR taps per output sample, at the capture rate
+RESAMPLE_KAISER_BETA = 8.0  # ~80 dB stopband
+
+# In-place DSP into preallocated scratch + int16 pool (needs AUDIO_QUEUE_MAX_MS > 0)
+DSP_INPLACE = True
+
 # =============================================================================
 # PATHS (anchored to script directory)
 # =============================================================================
 BASE_DIR = Path(__file__).resolve().parent
-OBS_DIR = BASE_DIR / "obs_text"
+# PSCANNER_OBS_DIR redirects every output file (replay.py writes elsewhere)
+OBS_DIR = Path(os.environ.get("PSCANNER_OBS_DIR", BASE_DIR / "obs_text"))
 OBS_DIR.mkdir(parents=True, exist_ok=True)
+TRACE_DIR = BASE_DIR / "traces"
 
 OBS_LIVE_FILE = OBS_DIR / "live_caption.txt"
 OBS_FINAL_FILE = OBS_DIR / "final_caption.txt"
-OBS_CAPTION_LOG_FILE = OBS_DIR / "caption_log.txt"
+OBS_CAPTION_LOG_DIR = OBS_DIR / "caption_log"
 LIVE_MAX_CHARS = 300
 
-FULL_LOG_FILE = OBS_DIR / "full_transcript_log.txt"
+FULL_LOG_DIR = OBS_DIR / "full_transcript_log"
 FULL_LOG_HTML_FILE = OBS_DIR / "full_transcript_log.html"
 
 SILENCE_GAP_SECONDS = 4.0
 TS_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Transcript log fsync: "line", "interval" or "os"
+LOG_FSYNC_MODE = "interval"
+LOG_FSYNC_INTERVAL_MS = 1000
+LOG_FSYNC_BYTES = 64 * 1024
+
+# Transcript log segments (transcript_store.py): rotate by "hour" or "size"
+LOG_SEGMENT_ROTATE = "hour"
+LOG_SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+LOG_SEGMENT_COMPRESS = True
+
+# Searchable index of every logged line (see transcript_index.py)
+TRANSCRIPT_INDEX_ENABLED = True
+TRANSCRIPT_INDEX_FILE = OBS_DIR / "transcript_index.sqlite3"
+
 # =============================================================================
 # LOWER THIRD MODE (HTML)
 # =============================================================================
@@ -130,10 +249,127 @@ LOWER_THIRD_HEIGHT = 360
 # keep just the most recent blocks visible in lower-third
 LOWER_THIRD_MAX_BLOCKS = 6
 
+# Static overlay CSS/JS, copied next to the generated HTML
+OVERLAY_ASSET_DIR = BASE_DIR / "overlay"
+OVERLAY_ASSETS = ("lower_third.css", "lower_third.js")
+
+# Push-based overlay: point the OBS Browser Source at http://OVERLAY_HOST:OVERLAY_PORT/
+OVERLAY_SERVER_ENABLED = True
+OVERLAY_HOST = "127.0.0.1"
+OVERLAY_PORT = 8765
+LOWER_THIRD_WRITE_FILE = True
+
+# For a file:// Browser Source: refresh it over obs-websocket (pip install obsws-python)
+OBS_REFRESH_ENABLED = False
+OBS_HOST = "localhost"
+OBS_PORT = 4455
+OBS_PASSWORD = os.environ.get("PSCANNER_OBS_PASSWORD", "")  # "" if none
+OBS_BROWSER_SOURCE = "Browser"     # default source name; per scanner: "obs_source"
+OBS_REFRESH_DEBOUNCE_MS = 500
+OBS_REFRESH_MAX_WAIT_MS = 2000
+OBS_REFRESH_MAX_HZ = 2.0
+OBS_RECONNECT_MAX = 30.0
+
+# =============================================================================
+# TABLE CHANGE TRACKING
+# =============================================================================
+# Watched tables: any edit rebuilds the span matcher and drops the transcript caches
+_tables_revision = 0
+
+def _touch_tables() -> None:
+    global _tables_revision
+    _tables_revision += 1
+
+class WatchedDict(dict):
+    """dict that bumps _tables_revision on every in-place change."""
+
+    def __setitem__(self, key, value):
+        _touch_tables()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        _touch_tables()
+        super().__delitem__(key)
+
+    def __ior__(self, other):
+        _touch_tables()
+        return super().__ior__(other)
+
+    def clear(self):
+        _touch_tables()
+        super().clear()
+
+    def pop(self, *args):
+        _touch_tables()
+        return super().pop(*args)
+
+    def popitem(self):
+        _touch_tables()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        _touch_tables()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        _touch_tables()
+        super().update(*args, **kwargs)
+
+class WatchedList(list):
+    """list that bumps _tables_revision on every in-place change."""
+
+    def __setitem__(self, index, value):
+        _touch_tables()
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        _touch_tables()
+        super().__delitem__(index)
+
+    def __iadd__(self, other):
+        _touch_tables()
+        return super().__iadd__(other)
+
+    def __imul__(self, n):
+        _touch_tables()
+        return super().__imul__(n)
+
+    def append(self, item):
+        _touch_tables()
+        super().append(item)
+
+    def extend(self, items):
+        _touch_tables()
+        super().extend(items)
+
+    def insert(self, index, item):
+        _touch_tables()
+        super().insert(index, item)
+
+    def pop(self, *args):
+        _touch_tables()
+        return super().pop(*args)
+
+    def remove(self, item):
+        _touch_tables()
+        super().remove(item)
+
+    def clear(self):
+        _touch_tables()
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        _touch_tables()
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        _touch_tables()
+        super().reverse()
+
 # =============================================================================
 # 10 / 11 CODES (meaning annotations)
 # =============================================================================
-CODE_MEANINGS: dict[str, str] = {
+CODE_MEANINGS: dict[str, str] = WatchedDict({
     "904": "Fire (specify)",
     "911UNK": "Unknown 911 calls",
     "952": "Report on conditions",
@@ -231,12 +467,12 @@ CODE_MEANINGS: dict[str, str] = {
 
     # ✅ Updated per your request
     "11-98": "Meet (another officer / RP / etc.)",
-}
+})
 
 # =============================================================================
 # PC CODES (subset)
 # =============================================================================
-PC_MEANINGS: dict[str, str] = {
+PC_MEANINGS: dict[str, str] = WatchedDict({
     "835": "Method of Arrest",
     "835a": "Effecting Arrest; Resistance",
     "484": "Theft (DEFINED)",
@@ -250,59 +486,30 @@ PC_MEANINGS: dict[str, str] = {
     "245": "Assault with a deadly weapon (FELONY)",
     "459": "Burglary (FELONY)",
     "602": "Trespassing (MISDEMEANOR)",
-}
+})
 
 # =============================================================================
 # KEYWORD / HIGHLIGHT CONFIG
 # =============================================================================
-ALERT_KEYWORDS = [
+ALERT_KEYWORDS = WatchedList([
     "Code 3", "Code 20", "Code 30", "Code 33",
     "Code 6A", "Code 6D", "Code 6F", "Code 6H", "Code 6M",
     "10-71", "10-72", "10-53", "10-54", "10-55", "10-56", "10-57",
     "10-80", "10-45",
-]
-LOCATIONS: list[str] = []
+])
+LOCATIONS: list[str] = WatchedList()
 
-PATTERN_ALERTS = re.compile(
-    r"\b(" + "|".join(map(re.escape, ALERT_KEYWORDS)) + r")\b",
-    re.IGNORECASE
-) if ALERT_KEYWORDS else None
-
-PATTERN_LOCATIONS = re.compile(
-    r"\b(" + "|".join(map(re.escape, LOCATIONS)) + r")\b",
-    re.IGNORECASE
-) if LOCATIONS else None
+# LRU caches for process_transcript / highlight_to_html, keyed by raw text
+TRANSCRIPT_CACHE_SIZE = 1024
 
 # =============================================================================
 # CALLSIGN REGEX RULES
 # =============================================================================
 NUM_WORDS = r"(?:\d{1,4}|one|won|two|to|too|three|four|for|ford|forth|five|six|seven|eight|ate|nine|ten)"
 
-CALLSIGN_SPACED = re.compile(
-    r"\b(" + "|".join(PHONETIC_UNITS) + r")\s+(" + NUM_WORDS + r")\b",
-    re.IGNORECASE
-)
-CALLSIGN_JOINED = re.compile(
-    r"\b(" + "|".join(PHONETIC_UNITS) + r")(\d{2,4})\b",
-    re.IGNORECASE
-)
-CALLSIGN_MULTI = re.compile(
-    r"\b(\d{0,2})\s*(" + "|".join(PHONETIC_UNITS) + r")(?:\s*(" + "|".join(PHONETIC_UNITS) + r")){1,4}\s*(\d{1,4})\b",
-    re.IGNORECASE
-)
-
 # =============================================================================
-# 10/11 CODE DETECTION (numeric + spoken)  ✅ UPDATED to include joined forms
+# 10/11 CODE HELPERS (spoken numbers, key normalization)
 # =============================================================================
-PATTERN_CODE_ANY_NUMERIC = re.compile(
-    r"\b("
-    r"(?:10|11)\s*[- ]\s*\d{1,3}\s*[A-Z]{0,3}"   # 10-23 / 10 23 / 11-98
-    r"|(?:10|11)\d{1,3}[A-Z]{0,3}"               # 10023 / 11098
-    r"|911UNK|904|952"
-    r")\b",
-    re.IGNORECASE
-)
-
 NUMBER_WORDS = [
     "zero", "oh",
     "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
@@ -311,15 +518,6 @@ NUMBER_WORDS = [
     "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety",
     "hundred",
 ]
-PATTERN_CODE_ANY_WORDS = re.compile(
-    r"\b(ten|eleven)\s+((?:"
-    + "|".join(NUMBER_WORDS)
-    + r")(?:[-\s]+(?:"
-    + "|".join(NUMBER_WORDS)
-    + r")){0,3})\b",
-    re.IGNORECASE
-)
-
 _WORD_TO_VAL = {
     "zero": 0, "oh": 0,
     "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
@@ -349,47 +547,6 @@ def _parse_number_words_phrase(phrase: str) -> int | None:
             current += v
     return current if seen else None
 
-def convert_spoken_codes_to_numeric(text: str) -> str:
-    if not text:
-        return text
-
-    def repl(m: re.Match) -> str:
-        prefix_word = m.group(1).lower()
-        rest_phrase = m.group(2)
-        prefix = "10" if prefix_word == "ten" else "11" if prefix_word == "eleven" else ""
-        n = _parse_number_words_phrase(rest_phrase)
-        if not prefix or n is None:
-            return m.group(0)
-        candidate = f"{prefix}-{n}"
-        return candidate if candidate in CODE_MEANINGS else m.group(0)
-
-    return PATTERN_CODE_ANY_WORDS.sub(repl, text)
-
-# ✅ NEW: convert joined numeric codes like 11098 -> 11-98 (only if it’s a known code)
-JOINED_10_11 = re.compile(r"\b(?P<prefix>10|11)(?P<body>\d{1,3})(?P<suffix>[A-Z]{0,3})\b", re.IGNORECASE)
-
-def convert_joined_numeric_codes(text: str) -> str:
-    if not text:
-        return text
-
-    def repl(m: re.Match) -> str:
-        prefix = m.group("prefix")
-        body_raw = m.group("body")
-        suffix = (m.group("suffix") or "").upper()
-
-        try:
-            body_int = int(body_raw)
-        except ValueError:
-            return m.group(0)
-
-        candidate = f"{prefix}-{body_int}{suffix}"
-        if candidate in CODE_MEANINGS:
-            return candidate
-
-        return m.group(0)
-
-    return JOINED_10_11.sub(repl, text)
-
 def normalize_code_key(raw_code: str) -> str:
     s = raw_code.strip()
     up = s.upper()
@@ -401,122 +558,9 @@ def normalize_code_key(raw_code: str) -> str:
     up = re.sub(r"\b(10|11)-(\d{1,3})-([A-Z]{1,3})\b", r"\1-\2\3", up)
     return up
 
-# ✅ UPDATED: joined -> spoken -> annotate
-def annotate_codes(text: str) -> str:
-    if not text:
-        return text
-
-    text = convert_joined_numeric_codes(text)
-    text = convert_spoken_codes_to_numeric(text)
-
-    def repl(m: re.Match) -> str:
-        raw = m.group(0)
-        key = normalize_code_key(raw)
-        meaning = CODE_MEANINGS.get(key)
-        if not meaning:
-            return raw
-        return f"{raw} ({meaning})"
-
-    return PATTERN_CODE_ANY_NUMERIC.sub(repl, text)
-
-# =============================================================================
-# "I'm 97" shorthand => treat as 10-97 if it exists
-# =============================================================================
-IM_SHORTHAND_NUMERIC = re.compile(
-    r"\b(?P<prefix>I'?m|I am|we'?re|we are)\s+(?P<num>\d{1,3})\b",
-    re.IGNORECASE
-)
-IM_SHORTHAND_WORDS = re.compile(
-    r"\b(?P<prefix>I'?m|I am|we'?re|we are)\s+(?P<words>(?:"
-    + "|".join(NUMBER_WORDS)
-    + r")(?:[-\s]+(?:"
-    + "|".join(NUMBER_WORDS)
-    + r")){0,3})\b",
-    re.IGNORECASE
-)
-
-def annotate_im_shorthand(text: str) -> str:
-    if not text:
-        return text
-
-    def repl_num(m: re.Match) -> str:
-        prefix = m.group("prefix")
-        num = int(m.group("num"))
-        key = f"10-{num}"
-        meaning = CODE_MEANINGS.get(key)
-        if not meaning:
-            return m.group(0)
-        return f"{prefix} {num} ({meaning})"
-
-    text = IM_SHORTHAND_NUMERIC.sub(repl_num, text)
-
-    def repl_words(m: re.Match) -> str:
-        prefix = m.group("prefix")
-        words = m.group("words")
-        n = _parse_number_words_phrase(words)
-        if n is None:
-            return m.group(0)
-        key = f"10-{n}"
-        meaning = CODE_MEANINGS.get(key)
-        if not meaning:
-            return m.group(0)
-        return f"{prefix} {n} ({meaning})"
-
-    text = IM_SHORTHAND_WORDS.sub(repl_words, text)
-    return text
-
-# =============================================================================
-# PC CODE DETECTION + ANNOTATION
-# =============================================================================
-PC_REF_1 = re.compile(r"\b(?P<code>\d{1,4}(?:\.\d+)?[a-z]?(?:\([^)]+\))?)\s*PC\b", re.IGNORECASE)
-PC_REF_2 = re.compile(r"\bPC\s*(?P<code>\d{1,4}(?:\.\d+)?[a-z]?(?:\([^)]+\))?)\b", re.IGNORECASE)
-
-def annotate_pc_codes(text: str) -> str:
-    if not text:
-        return text
-
-    def repl1(m: re.Match) -> str:
-        raw_code = m.group("code")
-        meaning = PC_MEANINGS.get(raw_code) or PC_MEANINGS.get(raw_code.lower())
-        if not meaning:
-            return m.group(0)
-        return f"{raw_code} PC ({meaning})"
-
-    def repl2(m: re.Match) -> str:
-        raw_code = m.group("code")
-        meaning = PC_MEANINGS.get(raw_code) or PC_MEANINGS.get(raw_code.lower())
-        if not meaning:
-            return m.group(0)
-        return f"PC {raw_code} ({meaning})"
-
-    text = PC_REF_1.sub(repl1, text)
-    text = PC_REF_2.sub(repl2, text)
-    return text
-
 # =============================================================================
 # 10-28 "INFO LOOKUP" (phonetic decode)
 # =============================================================================
-LOOKUP_TRIGGER = re.compile(
-    r"\b(10[\s-]?28|1028|ten\s+twenty\s+eight|ten\s+28)\b",
-    re.IGNORECASE
-)
-
-LOOKUP_STOP = re.compile(
-    r"\b("
-    r"dob|d\.o\.b|date\s+of\s+birth|birth\s+date|"
-    r"cii|c\.i\.i|"
-    r"returns?|returned|returning|comes?\s+back|"
-    r"record|ro|wants?|probation|parole|"
-    r"no\s+record|negative|clear|confirmed"
-    r")\b",
-    re.IGNORECASE
-)
-
-LOOKUP_SEPARATORS = re.compile(
-    r"\b(space|last\s+name|surname|family\s+name|first\s+name|middle\s+name|last)\b",
-    re.IGNORECASE
-)
-
 PHONETIC_TO_LETTER = {
     "adam": "A", "boy": "B", "charles": "C", "david": "D", "edward": "E",
     "frank": "F", "george": "G", "henry": "H", "ida": "I", "john": "J",
@@ -538,18 +582,72 @@ def is_number_token(tok: str) -> bool:
     t = tok.lower().strip()
     return re.fullmatch(r"(?:\d{1,4}|one|won|two|to|too|three|four|for|ford|forth|five|six|seven|eight|ate|nine|ten)", t, re.IGNORECASE) is not None
 
+# The same vocabulary as token sequences, for the word-by-word decoder
+def _phrases(*phrases: str) -> frozenset[tuple[str, ...]]:
+    return frozenset(tuple(p.split()) for p in phrases)
+
+LOOKUP_TRIGGER_WORDS = _phrases("10-28", "1028", "10 28", "ten twenty eight", "ten 28")
+LOOKUP_STOP_WORDS = _phrases(
+    "dob", "date of birth", "birth date", "cii",
+    "return", "returns", "returned", "returning", "come back", "comes back",
+    "record", "ro", "want", "wants", "probation", "parole",
+    "negative", "clear", "confirmed",
+)
+LOOKUP_SEPARATOR_WORDS = _phrases(
+    "space", "last", "surname", "family name", "first name", "middle name",
+)
+
+class LookupWord(NamedTuple):
+    token: str    # normalized, see normalize_phonetic_token
+    start: float  # audio seconds from the start of the stream
+
+def lookup_words(raw_words, transcript: str = "", start: float = 0.0) -> list[LookupWord]:
+    """LookupWords from a Deepgram `words` array (or the transcript's tokens at `start`)."""
+    if raw_words:
+        return [
+            LookupWord(normalize_phonetic_token(w.get("word", "")), float(w.get("start", start)))
+            for w in raw_words
+        ]
+    return [LookupWord(normalize_phonetic_token(t), start) for t in transcript.split()]
+
 class InfoLookupDecoder:
+    """Decodes a spelled 10-28 name from word-timestamped phonetic letters."""
+
     def __init__(self, window_seconds: float = 14.0, min_letters_per_word: int = 3):
         self.window_seconds = window_seconds
         self.min_letters_per_word = min_letters_per_word
+        self.offset = 0.0      # audio time at which the current stream started
+        self.high_water = 0.0  # latest word time seen
+        self.recent: deque[str] = deque(maxlen=3)
+        self.reset()
+
+    def reset(self):
         self.active_until: float = 0.0
         self.words: list[str] = []
         self.current_letters: list[str] = []
+        self.pending: str | None = None  # letter waiting to see if a number follows
 
-    def reset(self):
-        self.active_until = 0.0
-        self.words = []
-        self.current_letters = []
+    def new_stream(self, downtime: float = 0.0) -> None:
+        """Deepgram timestamps restart at 0 on every connection."""
+        self.offset = self.high_water + downtime
+
+    def advance(self, seconds: float) -> None:
+        """Audio that was never sent (VAD-gated) still counts toward the window."""
+        self.offset += seconds
+
+    def _state(self) -> tuple:
+        return (self.active_until, self.words[:], self.current_letters[:], self.pending,
+                tuple(self.recent), self.high_water)
+
+    def _restore(self, state: tuple) -> None:
+        (self.active_until, self.words, self.current_letters, self.pending,
+         recent, self.high_water) = state
+        self.recent.clear()
+        self.recent.extend(recent)
+
+    def _recent_matches(self, phrases: frozenset) -> bool:
+        r = tuple(self.recent)
+        return any(r[i:] in phrases for i in range(len(r)))
 
     def _finalize_current_word(self):
         if self.current_letters:
@@ -558,23 +656,6 @@ class InfoLookupDecoder:
             if len(w) >= self.min_letters_per_word:
                 self.words.append(w)
 
-    def _extract_letters(self, transcript: str) -> list[str]:
-        raw = re.split(r"\s+", transcript.strip())
-        out: list[str] = []
-        i = 0
-        while i < len(raw):
-            tok = normalize_phonetic_token(raw[i])
-            if tok in PHONETIC_TO_LETTER:
-                # skip callsigns like "Adam 12"
-                if i + 1 < len(raw):
-                    nxt = normalize_phonetic_token(raw[i + 1])
-                    if is_number_token(nxt):
-                        i += 2
-                        continue
-                out.append(PHONETIC_TO_LETTER[tok])
-            i += 1
-        return out
-
     def _emit_if_ready(self) -> str | None:
         self._finalize_current_word()
         if len(self.words) >= 2:
@@ -583,39 +664,208 @@ class InfoLookupDecoder:
             return result
         return None
 
-    def process_final(self, transcript: str, now: float) -> str | None:
-        if not transcript:
+    def feed(self, word: LookupWord) -> str | None:
+        tok = word.token
+        t = self.offset + word.start
+        self.high_water = max(self.high_water, t)
+        self.recent.append(tok)
+        if self._recent_matches(LOOKUP_TRIGGER_WORDS):
+            self.active_until = max(self.active_until, t + self.window_seconds)
+            return None
+        if not self.active_until or t > self.active_until:
+            if self.active_until:
+                self.reset()
             return None
 
-        if LOOKUP_TRIGGER.search(transcript):
-            self.active_until = max(self.active_until, now + self.window_seconds)
-
-        if now > self.active_until:
+        if self.pending is not None:
+            letter, self.pending = self.pending, None
+            if is_number_token(tok):
+                return None
+            self.current_letters.append(letter)
+        letter = PHONETIC_TO_LETTER.get(tok)
+        if letter is not None:
+            self.pending = letter
+            return None
+        if self._recent_matches(LOOKUP_STOP_WORDS):
+            out = self._emit_if_ready()
             self.reset()
+            return out
+        if self._recent_matches(LOOKUP_SEPARATOR_WORDS):
+            self._finalize_current_word()
+        return None
+
+    def end_segment(self) -> str | None:
+        """End of a final: a trailing letter counts and the word closes."""
+        if not self.active_until:
+            self.pending = None
+            return None
+        if self.pending is not None:
+            self.current_letters.append(self.pending)
+            self.pending = None
+        return self._emit_if_ready()
+
+    def process_words(self, words: list[LookupWord]) -> str | None:
+        """Commit a final's words; returns the decode if one completed."""
+        out = None
+        for w in words:
+            out = self.feed(w) or out
+        return self.end_segment() or out
+
+    def preview(self, words: list[LookupWord]) -> str | None:
+        """Partial decode an interim's words would give, state untouched."""
+        if not self.active_until and not any(w.token in PHONETIC_TO_LETTER for w in words):
             return None
+        state = self._state()
+        try:
+            for w in words:
+                out = self.feed(w)
+                if out:
+                    return out
+            if not self.active_until:
+                return None
+            letters = self.current_letters + ([self.pending] if self.pending else [])
+            parts = self.words + ["".join(letters)]
+            partial = " ".join(p for p in parts if p)
+            return partial + "..." if partial else None
+        finally:
+            self._restore(state)
 
-        stop_hit = LOOKUP_STOP.search(transcript) is not None
-        sep_hit = LOOKUP_SEPARATORS.search(transcript) is not None
+    def process_final(self, transcript: str, now: float) -> str | None:
+        """Text-only entry point: every token stamped at `now`."""
+        if not transcript:
+            return None
+        return self.process_words(lookup_words(None, transcript, now - self.offset))
 
-        letters = self._extract_letters(transcript)
-        if letters:
-            self.current_letters.extend(letters)
+# =============================================================================
+# LATENCY TRACING (capture -> caption, per stage)
+# =============================================================================
+class LatencyHistogram:
+    """Fixed-memory HDR-style histogram of durations (~3% relative error)."""
 
-        if sep_hit:
-            self._finalize_current_word()
+    SUB = 32
+    LINEAR = 2 * SUB
+    SIZE = LINEAR + 22 * SUB
 
-        if stop_hit:
-            out = self._emit_if_ready()
-            self.reset()
-            return out
+    def __init__(self):
+        self.counts = [0] * self.SIZE
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def _index(self, us: int) -> int:
+        if us < self.LINEAR:
+            return us
+        shift = us.bit_length() - 6
+        return min(self.SIZE - 1, self.LINEAR + (shift - 1) * self.SUB + (us >> shift) - self.SUB)
+
+    def _bounds_us(self, idx: int) -> tuple[int, int]:
+        if idx < self.LINEAR:
+            return idx, idx + 1
+        shift = (idx - self.LINEAR) // self.SUB + 1
+        sub = (idx - self.LINEAR) % self.SUB + self.SUB
+        return sub << shift, (sub + 1) << shift
+
+    def record(self, seconds: float) -> None:
+        if seconds < 0.0:
+            seconds = 0.0
+        idx = self._index(int(seconds * 1e6))
+        with self.lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Value (seconds) at percentile p (0-100), bucket midpoint."""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                lo, hi = self._bounds_us(idx)
+                return min(self.max, (lo + hi) / 2e6)
+        return self.max
+
+    def cumulative(self, bounds: tuple[float, ...]) -> list[int]:
+        """Counts at or below each bound (seconds), for Prometheus buckets."""
+        out = []
+        seen = 0
+        idx = 0
+        for bound in bounds:
+            while idx < self.SIZE and self._bounds_us(idx)[1] <= bound * 1e6:
+                seen += self.counts[idx]
+                idx += 1
+            out.append(seen)
+        return out
 
-        out = self._emit_if_ready()
-        if out:
-            return out
+class LatencyTracer:
+    """One latency histogram per pipeline stage (see CHANNEL_STAGES)."""
 
-        return None
+    CHANNEL_STAGES = (
+        "dsp", "queue_wait", "send", "asr", "capture_to_result",
+        "postprocess", "capture_to_caption", "overlay_push",
+    )
+    PROM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    PROM_NAME = "pscanner_stage_latency_seconds"
+    PROM_QUANTILE_NAME = "pscanner_stage_latency_quantile_seconds"
+
+    def __init__(self, stages: tuple[str, ...] = CHANNEL_STAGES):
+        self.hist = {stage: LatencyHistogram() for stage in stages}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.hist[stage].record(seconds)
+
+    def summary(self) -> str:
+        lines = ["latency (ms)        count     p50     p90     p99     max"]
+        for stage, h in self.hist.items():
+            if not h.count:
+                continue
+            lines.append(
+                f"  {stage:18s}{h.count:6d} {1000 * h.percentile(50):7.1f} "
+                f"{1000 * h.percentile(90):7.1f} {1000 * h.percentile(99):7.1f} {1000 * h.max:7.1f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus_histograms(self, channel: str) -> list[str]:
+        name = self.PROM_NAME
+        out = []
+        for stage, h in self.hist.items():
+            labels = f'channel="{channel}",stage="{stage}"'
+            for bound, n in zip(self.PROM_BUCKETS, h.cumulative(self.PROM_BUCKETS)):
+                out.append(f'{name}_bucket{{{labels},le="{bound}"}} {n}')
+            out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+            out.append(f"{name}_sum{{{labels}}} {h.total:.6f}")
+            out.append(f"{name}_count{{{labels}}} {h.count}")
+        return out
 
-lookup_decoder = InfoLookupDecoder()
+    def prometheus_quantiles(self, channel: str) -> list[str]:
+        out = []
+        for stage, h in self.hist.items():
+            for q in (0.5, 0.9, 0.99):
+                out.append(
+                    f'{self.PROM_QUANTILE_NAME}{{channel="{channel}",stage="{stage}",quantile="{q}"}} '
+                    f"{h.percentile(q * 100):.6f}"
+                )
+        return out
+
+# Shared by all channels (the file writer thread serves every channel)
+io_latency = LatencyTracer(("file_write",))
+
+def capture_end_time(time_info, frames: int, rate: int = SAMPLE_RATE) -> float:
+    """time.monotonic() at which the last frame of a PortAudio block was captured."""
+    now = time.monotonic()
+    try:
+        adc = time_info.inputBufferAdcTime
+        current = time_info.currentTime
+    except AttributeError:
+        return now
+    if adc > 0.0 and current > 0.0 and 0.0 <= current - adc < 1.0:
+        return min(now, now - (current - adc) + frames / rate)
+    return now
 
 # =============================================================================
 # FILE IO (Windows / OBS lock-safe)
@@ -636,19 +886,193 @@ def atomic_write(path: Path, text: str, retries: int = 20, delay: float = 0.03)
     except Exception:
         pass
 
-def append_flush_fsync(path: Path, line: str) -> None:
-    with path.open("a", encoding="utf-8") as f:
-        f.write(line)
+class BackgroundFileWriter(threading.Thread):
+    """Latest-wins write-behind thread for whole-file rewrites."""
+
+    def __init__(self):
+        super().__init__(name="file-writer", daemon=True)
+        self.slots: dict[Path, tuple[str, float, object]] = {}
+        self.cond = threading.Condition()
+        self.running = True
+        self.writes = 0
+        self.superseded = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def submit(self, path: Path, text: str, on_written=None) -> None:
+        """Queue `text` for `path`; on_written(path) runs once it is on disk."""
+        with self.cond:
+            if path in self.slots:
+                self.superseded += 1
+            self.slots[path] = (text, time.monotonic(), on_written)
+            self.cond.notify()
+
+    def depth(self) -> int:
+        return len(self.slots)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.slots and self.running:
+                    self.cond.wait()
+                if not self.slots:
+                    return
+                path = next(iter(self.slots))
+                text, submitted, on_written = self.slots.pop(path)
+            atomic_write(path, text)
+            if on_written is not None:
+                on_written(path)
+            elapsed = time.monotonic() - submitted
+            self.writes += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            io_latency.record("file_write", elapsed)
+
+    def stop(self) -> None:
+        """Write whatever is still pending, then end the thread."""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.is_alive():
+            self.join()
+
+    def stats(self) -> str:
+        writes = max(1, self.writes)
+        return (
+            f"file writer: {self.writes} writes, {self.superseded} superseded, "
+            f"depth {self.depth()}, latency avg {1000 * self.latency_total / writes:.1f}ms "
+            f"max {1000 * self.latency_max:.1f}ms"
+        )
+
+file_writer = BackgroundFileWriter()
+
+class LogAppender:
+    """Append-only transcript logs with persistent handles and group commit."""
+
+    def __init__(self, mode: str, interval_ms: float, max_pending_bytes: int):
+        self.mode = mode
+        self.interval = interval_ms / 1000.0
+        self.max_pending_bytes = max_pending_bytes
+        self.handles: dict[Path, object] = {}
+        self.dirty: set[Path] = set()
+        self.pending_bytes = 0
+        # appends take `lock`; fsync/close only take `sync_lock`
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.lines = 0
+        self.commits = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def _handle(self, path: Path):
+        f = self.handles.get(path)
+        if f is None:
+            f = path.open("ab")
+            self.handles[path] = f
+        return f
+
+    def append(self, path: Path, line: str | bytes) -> None:
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        with self.lock:
+            f = self._handle(path)
+            f.write(line)
+            self.lines += 1
+            if self.mode == "line":
+                self._sync(f)
+                self.commits += 1
+            elif self.mode == "os":
+                f.flush()
+            else:
+                self.dirty.add(path)
+                self.pending_bytes += len(line)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-commit", daemon=True)
+                    self._thread.start()
+                if self.pending_bytes >= self.max_pending_bytes:
+                    self._wake.set()
+
+    @staticmethod
+    def _sync(f) -> None:
         f.flush()
         try:
             os.fsync(f.fileno())
         except OSError:
             pass
 
-def contains_alert(text: str) -> bool:
-    if not text or PATTERN_ALERTS is None:
-        return False
-    return PATTERN_ALERTS.search(text) is not None
+    @staticmethod
+    def _fsync(f) -> None:
+        try:
+            os.fsync(f.fileno())
+        except (OSError, ValueError):
+            pass
+
+    def release(self, path: Path) -> None:
+        """Commit and close one file (e.g. a rotated-out log segment)."""
+        with self.lock:
+            f = self.handles.pop(path, None)
+            self.dirty.discard(path)
+            if f is None:
+                return
+            f.flush()
+        with self.sync_lock:
+            self._fsync(f)
+            f.close()
+
+    def commit(self) -> None:
+        """Flush and fsync every file written since the last commit."""
+        with self.lock:
+            if not self.dirty:
+                return
+            files = [self.handles[path] for path in self.dirty]
+            for f in files:
+                f.flush()
+            self.dirty = set()
+            self.pending_bytes = 0
+            self.commits += 1
+        with self.sync_lock:
+            for f in files:
+                if not f.closed:
+                    self._fsync(f)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.commit()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self.commit()
+        with self.lock:
+            files = list(self.handles.values())
+            self.handles.clear()
+            self.dirty = set()
+            for f in files:
+                f.flush()
+        with self.sync_lock:
+            for f in files:
+                self._fsync(f)
+                f.close()
+
+    def stats(self) -> str:
+        return f"log appender: {self.lines} lines, {self.commits} fsync groups ({self.mode})"
+
+log_appender = LogAppender(LOG_FSYNC_MODE, LOG_FSYNC_INTERVAL_MS, LOG_FSYNC_BYTES)
+atexit.register(log_appender.close)
+
+def install_shutdown_handlers(loop: asyncio.AbstractEventLoop, task: asyncio.Task) -> None:
+    """SIGTERM/SIGHUP (SIGBREAK on Windows) cancel `task` so main() can clean up."""
+    for name in ("SIGTERM", "SIGHUP", "SIGBREAK"):
+        sig = getattr(signal, name, None)
+        if sig is None:
+            continue
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(task.cancel))
 
 def _maybe_split_joined_digits(digits: str):
     if len(digits) == 4 and digits.isdigit():
@@ -660,54 +1084,300 @@ def _maybe_split_joined_digits(digits: str):
     return None, None
 
 # =============================================================================
-# HTML HIGHLIGHTING
+# SPAN MATCHER (one pass over the raw transcript)
 # =============================================================================
-def highlight_to_html(text: str) -> str:
-    if not text:
-        return ""
+# One compiled alternation finds every code, callsign, alert and location in one scan.
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    kind: str             # code | pc | callsign | number | alert | lookup | location
+    css: str              # highlight class ("" = annotate only)
+    text: str             # display text (may normalize the raw match)
+    key: str              # normalized entity key, e.g. "10-71", "245", "ADAM 12"
+    meaning: str | None = None
+    alert: bool = False
+
+_CALLSIGN_NUM_VALUES = {
+    "one": "1", "won": "1", "two": "2", "to": "2", "too": "2", "three": "3",
+    "four": "4", "for": "4", "ford": "4", "forth": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "ate": "8", "nine": "9", "ten": "10",
+}
+
+LOOKUP_CODE = "10-28"
+
+def _alt(name: str, words: list[str]) -> str:
+    words = sorted(words, key=len, reverse=True)  # longest first: "Code 30" before "Code 3"
+    return r"\b(?P<" + name + r">" + "|".join(map(re.escape, words)) + r")\b"
+
+def build_span_matcher() -> re.Pattern:
+    units = r"(?:" + "|".join(PHONETIC_UNITS) + r")"
+    num_phrase = (
+        r"(?:" + "|".join(NUMBER_WORDS) + r")(?:[-\s]+(?:" + "|".join(NUMBER_WORDS) + r")){0,3}"
+    )
+    pc_code = r"\d{1,4}(?:\.\d+)?[a-z]?(?:\([^)]+\))?"
+    alternatives = [
+        r"\b(?P<im>(?P<im_pre>I'?m|I am|we'?re|we are)\s+"
+        r"(?:(?P<im_num>\d{1,3})(?!-)|(?P<im_words>" + num_phrase + r")))\b",
+        r"\b(?P<lookup>10[\s-]?28|1028|ten\s+twenty\s+eight|ten\s+28)\b",
+        r"\b(?P<code>(?P<c_pre>10|11)(?P<c_sep>\s*[- ]\s*|(?=\d))(?P<c_body>\d{1,3})"
+        r"(?P<c_suf>\s*[A-Z]{1,3})?|911UNK|904|952)\b",
+        r"\b(?P<spoken>(?P<s_pre>ten|eleven)\s+(?P<s_words>" + num_phrase + r"))\b",
+        r"\b(?P<pc1>(?P<pc1_code>" + pc_code + r")\s*PC)\b",
+        r"\b(?P<pc2>PC\s*(?P<pc2_code>" + pc_code + r"))\b",
+        r"\b(?P<multi>\d{0,2}\s*" + units + r"(?:\s*" + units + r"){1,4}\s*\d{1,4})\b",
+        r"\b(?P<joined>(?P<j_unit>" + units + r")(?P<j_digits>\d{2,4}))\b",
+        r"\b(?P<spaced>(?P<sp_unit>" + units + r")\s+(?P<sp_num>" + NUM_WORDS + r"))\b",
+    ]
+    if ALERT_KEYWORDS:
+        alternatives.append(_alt("alert", ALERT_KEYWORDS))
+    if LOCATIONS:
+        alternatives.append(_alt("loc", LOCATIONS))
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+def _alert_pattern() -> re.Pattern | None:
+    # alerts fire on the words heard, not on a normalized key
+    if not ALERT_KEYWORDS:
+        return None
+    return re.compile("|".join(map(re.escape, ALERT_KEYWORDS)), re.IGNORECASE)
+
+def is_alert_text(raw: str) -> bool:
+    return ALERT_PATTERN is not None and ALERT_PATTERN.fullmatch(raw) is not None
+
+def _tables_sig() -> tuple:
+    return (_tables_revision, id(CODE_MEANINGS), id(PC_MEANINGS), id(ALERT_KEYWORDS), id(LOCATIONS))
+
+SPAN_MATCHER = build_span_matcher()
+ALERT_PATTERN = _alert_pattern()
+_tables_signature = _tables_sig()
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    safe = htmlmod.escape(text)
+    def get(self, key):
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.data.clear()
+
+    def stats(self) -> str:
+        total = max(1, self.hits + self.misses)
+        return (
+            f"{len(self.data)}/{self.maxsize} entries, hit rate {100 * self.hits / total:.0f}% "
+            f"({self.hits} hits, {self.misses} misses, {self.evictions} evictions)"
+        )
+
+process_cache = LRUCache(TRANSCRIPT_CACHE_SIZE)
+highlight_cache = LRUCache(TRANSCRIPT_CACHE_SIZE)
+
+def sync_tables() -> None:
+    """Rebuild the matcher and drop cached output if any table changed."""
+    global SPAN_MATCHER, ALERT_PATTERN, _tables_signature
+    sig = _tables_sig()
+    if sig == _tables_signature:
+        return
+    SPAN_MATCHER = build_span_matcher()
+    ALERT_PATTERN = _alert_pattern()
+    process_cache.clear()
+    highlight_cache.clear()
+    _tables_signature = sig
+
+def _code_span(start: int, end: int, raw: str, key: str, normalize: bool = False) -> Span:
+    meaning = CODE_MEANINGS.get(key)
+    shown = key if normalize and meaning else raw
+    return Span(start, end, "code", "ten", shown, key, meaning, is_alert_text(raw))
+
+def _spans_from_match(m: re.Match) -> list[Span] | None:
+    """Turn one matcher hit into spans; None means "not ours, keep scanning"."""
+    group = m.lastgroup
+    start, end = m.span()
+
+    if group == "im":
+        if m.group("im_num") is not None:
+            n = int(m.group("im_num"))
+        else:
+            n = _parse_number_words_phrase(m.group("im_words"))
+        key = f"10-{n}"
+        if n is None or key not in CODE_MEANINGS:
+            return None
+        return [Span(start, end, "code", "", f"{m.group('im_pre')} {n}", key,
+                     CODE_MEANINGS[key], is_alert_text(m.group(0)))]
 
-    if PATTERN_ALERTS:
-        safe = PATTERN_ALERTS.sub(r"<span class='hl alert'>\1</span>", safe)
+    if group == "lookup":
+        raw = m.group(0)
+        shown = raw if raw[:2] == "10" and not raw.isdigit() else LOOKUP_CODE
+        return [Span(start, end, "lookup", "lookup", shown, LOOKUP_CODE,
+                     CODE_MEANINGS.get(LOOKUP_CODE), is_alert_text(raw))]
+
+    if group == "code":
+        body = m.group("c_body")
+        if body is None:  # 911UNK / 904 / 952
+            raw = m.group(0)
+            return [_code_span(start, end, raw, raw.upper())]
+        prefix = m.group("c_pre")
+        joined = not m.group("c_sep")
+        base = f"{prefix}-{int(body)}" if joined else normalize_code_key(f"{prefix}-{body}")
+        suffix = m.group("c_suf")
+        if suffix:
+            key = base + suffix.strip().upper()
+            if key in CODE_MEANINGS:
+                return [_code_span(start, end, m.group(0), key, normalize=joined)]
+            if suffix[0] not in " \t":
+                return None  # "10-45B": an unknown code, leave it as heard
+            end = m.start("c_suf")  # unknown suffix: it's just the next word
+        return [_code_span(start, end, m.string[start:end], base, normalize=joined)]
+
+    if group == "spoken":
+        prefix = "10" if m.group("s_pre").lower() == "ten" else "11"
+        n = _parse_number_words_phrase(m.group("s_words"))
+        key = f"{prefix}-{n}"
+        if n is None or key not in CODE_MEANINGS:
+            return None
+        return [Span(start, end, "code", "ten", key, key, CODE_MEANINGS[key], is_alert_text(m.group(0)))]
 
-    safe = CALLSIGN_SPACED.sub(r"<span class='hl unit'>\g<0></span>", safe)
+    if group in ("pc1", "pc2"):
+        code = m.group(group + "_code")
+        meaning = PC_MEANINGS.get(code) or PC_MEANINGS.get(code.lower())
+        if meaning:
+            shown = f"{code} PC" if group == "pc1" else f"PC {code}"
+        else:
+            shown = m.group(0)
+        return [Span(start, end, "pc", "ten", shown, code.lower(), meaning)]
 
-    def repl_joined(m: re.Match) -> str:
-        unit = m.group(1)
-        digits = m.group(2)
+    if group == "multi":
+        raw = m.group(0)
+        return [Span(start, end, "callsign", "unit", raw, " ".join(raw.upper().split()))]
+
+    if group == "joined":
+        unit = m.group("j_unit")
+        digits = m.group("j_digits")
         unit_digit, tail = _maybe_split_joined_digits(digits)
         if unit_digit and tail:
-            return (
-                f"<span class='hl unit'>{htmlmod.escape(unit)} {htmlmod.escape(unit_digit)}</span> "
-                f"<span class='hl ten'>{htmlmod.escape(tail)}</span>"
-            )
-        return f"<span class='hl unit'>{htmlmod.escape(m.group(0))}</span>"
+            mid = m.start("j_digits") + 1
+            return [
+                Span(start, mid, "callsign", "unit", f"{unit} {unit_digit}", f"{unit.upper()} {unit_digit}"),
+                Span(mid, end, "number", "ten", tail, tail),
+            ]
+        return [Span(start, end, "callsign", "unit", m.group(0), f"{unit.upper()} {digits}")]
+
+    if group == "spaced":
+        num = m.group("sp_num")
+        if num.lower() in ("ten", "10", "11"):
+            # "Adam ten four" is a unit giving a 10-4, not callsign "Adam 10"
+            code = SPAN_MATCHER.match(m.string, m.start("sp_num"))
+            found = _spans_from_match(code) if code else None
+            if found and found[0].kind in ("code", "lookup"):
+                return None
+        num = _CALLSIGN_NUM_VALUES.get(num.lower(), num)
+        return [Span(start, end, "callsign", "unit", m.group(0), f"{m.group('sp_unit').upper()} {num}")]
+
+    if group == "alert":
+        raw = m.group(0)
+        key = normalize_code_key(raw)
+        return [Span(start, end, "alert", "alert", raw, key, CODE_MEANINGS.get(key), True)]
 
-    safe = CALLSIGN_JOINED.sub(repl_joined, safe)
-    safe = CALLSIGN_MULTI.sub(r"<span class='hl unit'>\g<0></span>", safe)
+    if group == "loc":
+        raw = m.group(0)
+        return [Span(start, end, "location", "loc", raw, raw.upper())]
 
-    safe = PATTERN_CODE_ANY_NUMERIC.sub(r"<span class='hl ten'>\g<0></span>", safe)
-    safe = LOOKUP_TRIGGER.sub(r"<span class='hl lookup'>\1</span>", safe)
+    return None
 
-    safe = re.sub(
-        r"\bPC\s*\d{1,4}(?:\.\d+)?[a-z]?(?:\([^)]+\))?\b",
-        lambda m: f"<span class='hl ten'>{m.group(0)}</span>",
-        safe,
-        flags=re.IGNORECASE,
-    )
+def scan_transcript(text: str) -> list[Span]:
+    spans: list[Span] = []
+    if not text:
+        return spans
+    search = SPAN_MATCHER.search
+    pos = 0
+    while True:
+        m = search(text, pos)
+        if m is None:
+            return spans
+        found = _spans_from_match(m)
+        if found:
+            spans.extend(found)
+            pos = found[-1].end
+        else:
+            pos = m.start() + 1
 
-    if PATTERN_LOCATIONS:
-        safe = PATTERN_LOCATIONS.sub(r"<span class='hl loc'>\1</span>", safe)
+def render_annotated(text: str, spans: list[Span]) -> str:
+    """Plain text with normalized codes and "(meaning)" annotations."""
+    if not spans:
+        return text
+    out = []
+    pos = 0
+    for s in spans:
+        out.append(text[pos:s.start])
+        out.append(text[s.start:s.end] if s.kind in ("callsign", "number") else s.text)
+        if s.meaning:
+            out.append(f" ({s.meaning})")
+        pos = s.end
+    out.append(text[pos:])
+    return "".join(out)
+
+def render_html(text: str, spans: list[Span], annotate: bool = True) -> str:
+    """Escaped HTML with highlight spans (plus annotations when `annotate`)."""
+    esc = htmlmod.escape
+    out = []
+    pos = 0
+    for s in spans:
+        out.append(esc(text[pos:s.start]))
+        shown = esc(s.text if annotate else text[s.start:s.end])
+        if s.css:
+            out.append(f"<span class='hl {s.css}'>{shown}</span>")
+        else:
+            out.append(shown)
+        if annotate and s.meaning:
+            out.append(esc(f" ({s.meaning})"))
+        pos = s.end
+    out.append(esc(text[pos:]))
+    return "".join(out)
 
-    return safe
+def contains_alert(text: str) -> bool:
+    if not text:
+        return False
+    return process_transcript(text).alert
+
+def highlight_to_html(text: str) -> str:
+    """Highlight already-annotated text (no further annotation added)."""
+    if not text:
+        return ""
+    sync_tables()
+    out = highlight_cache.get(text)
+    if out is None:
+        out = render_html(text, scan_transcript(text), annotate=False)
+        highlight_cache.put(text, out)
+    return out
 
 # =============================================================================
 # OBS + LOG WRITERS
 # =============================================================================
 class OBSCaptionWriter:
-    def __init__(self):
+    def __init__(self, live_path: Path, final_path: Path, log_store: TranscriptStore):
         self.last_live = ""
+        self.live_path = live_path
+        self.final_path = final_path
+        self.log_store = log_store
 
     def update_live(self, text: str):
         text = text.strip()
@@ -718,30 +1388,108 @@ class OBSCaptionWriter:
         if text == self.last_live:
             return
         self.last_live = text
-        atomic_write(OBS_LIVE_FILE, text)
+        file_writer.submit(self.live_path, text)
 
     def write_final(self, text: str):
         text = text.strip()
         if not text:
             return
-        atomic_write(OBS_FINAL_FILE, text)
-        ts = time.strftime(TS_FORMAT)
-        append_flush_fsync(OBS_CAPTION_LOG_FILE, f"[{ts}] {text}\n")
+        file_writer.submit(self.final_path, text)
+        now = time.time()
+        ts = time.strftime(TS_FORMAT, time.localtime(now))
+        self.log_store.write(f"[{ts}] {text}\n", now)
+
+class TranscriptBlock:
+    """One lower-third bubble: a timestamp, its lines and any lookups."""
+    __slots__ = ("id", "ts", "lines", "html_lines", "lookups")
+
+    def __init__(self, block_id: int, ts: str):
+        self.id = block_id
+        self.ts = ts
+        self.lines: list[str] = []
+        self.html_lines: list[str] = []
+        self.lookups: list[str] = []
+
+    def render(self, age: str) -> str:
+        parts = [
+            f"<div class='block' id='b{self.id}' data-age='{age}'>",
+            f"<div class='ts'>{htmlmod.escape(self.ts)}</div>",
+        ]
+        for line_html in self.html_lines:
+            parts.append(f"<div class='line'>{line_html}</div>")
+        for decoded in self.lookups:
+            parts.append(
+                f"<div class='lookupline'><span class='hl lookup'>INFO LOOKUP:</span> {htmlmod.escape(decoded)}</div>"
+            )
+        parts.append("</div>")
+        return "\n".join(parts)
+
+def install_overlay_assets(dest_dir: Path) -> None:
+    """Copy the static overlay CSS/JS next to the generated HTML (if changed)."""
+    for name in OVERLAY_ASSETS:
+        src = OVERLAY_ASSET_DIR / name
+        dst = dest_dir / name
+        data = src.read_bytes()
+        try:
+            if dst.read_bytes() == data:
+                continue
+        except OSError:
+            pass
+        dst.write_bytes(data)
 
 class FullTranscriptLogger:
-    def __init__(self, txt_path: Path, html_path: Path, gap_seconds: float):
-        self.txt_path = txt_path
+    HTML_HEAD = (
+        "<!doctype html>\n<html><head><meta charset='utf-8'>\n"
+        "<link rel='stylesheet' href='lower_third.css'>\n"
+        "</head><body data-reload='{reload}'>\n<div class='stage'>\n<div class='stack' id='stack'>"
+    )
+    HTML_TAIL = "</div></div>\n<script src='lower_third.js'></script>\n</body></html>"
+
+    # span kinds worth searching for, mapped to transcript_index entity kinds
+    INDEXED_SPANS = {"code": "code", "lookup": "code", "pc": "pc", "callsign": "callsign"}
+
+    def __init__(
+        self,
+        log_store: TranscriptStore,
+        html_path: Path,
+        gap_seconds: float,
+        index: TranscriptIndex | None = None,
+        self_reload: bool = True,
+    ):
+        self.log_store = log_store
+        self.index = index
         self.html_path = html_path
+        # file:// pages reload themselves unless OBS refresh is on
+        self.html_head = self.HTML_HEAD.format(reload="self" if self_reload else "obs")
         self.gap_seconds = gap_seconds
         self.last_write_time: float | None = None
-        self.blocks: list[dict] = []
         self.max_blocks = 300
-        self._write_html()
-
-    def _ts(self) -> str:
-        return time.strftime(TS_FORMAT)
-
-    def add_entry(self, text: str, kind: str = "final", lookup_decoded: str | None = None):
+        self.blocks: deque[TranscriptBlock] = deque(maxlen=self.max_blocks)
+        # closed blocks are rendered once and kept
+        visible = LOWER_THIRD_MAX_BLOCKS if LOWER_THIRD_MODE else self.max_blocks
+        self.visible_blocks = visible
+        self.closed_fragments: deque[tuple[int, str]] = deque(maxlen=max(0, visible - 1))
+        self.next_block_id = 0
+        # called with {"op": "block", "id", "html"} per changed block
+        self.listeners: list = []
+        # called with the HTML path once a rewrite reaches the disk
+        self.file_listeners: list = []
+        install_overlay_assets(self.html_path.parent)
+        self._write_html("")
+
+    @staticmethod
+    def _ts(now: float) -> str:
+        return time.strftime(TS_FORMAT, time.localtime(now))
+
+    def add_entry(
+        self,
+        text: str,
+        kind: str = "final",
+        lookup_decoded: str | None = None,
+        html: str | None = None,
+        spans: tuple = (),
+    ):
+        """Log one line; `html` and `spans` come from process_transcript."""
         text = text.strip()
         if not text:
             return
@@ -753,171 +1501,573 @@ class FullTranscriptLogger:
         )
 
         if start_new_entry:
-            append_flush_fsync(self.txt_path, f"[{self._ts()}] {text}\n")
+            self.log_store.write(f"[{self._ts(now)}] {text}\n", now)
         else:
-            append_flush_fsync(self.txt_path, f"    {text}\n")
+            self.log_store.write(f"    {text}\n", now, entry_start=False)
 
         if lookup_decoded:
-            append_flush_fsync(self.txt_path, f"    INFO LOOKUP: {lookup_decoded}\n")
+            self.log_store.write(f"    INFO LOOKUP: {lookup_decoded}\n", now, entry_start=False)
 
-        if start_new_entry or not self.blocks:
-            self.blocks.append({"ts": self._ts(), "lines": [], "lookups": []})
+        if self.index is not None:
+            entities = [
+                (self.INDEXED_SPANS[s.kind], s.key) for s in spans if s.kind in self.INDEXED_SPANS
+            ]
+            self.index.add(now, kind, text, lookup_decoded, entities)
 
-        line_to_store = text + (" [partial]" if kind == "partial" else "")
-        self.blocks[-1]["lines"].append(line_to_store)
+        if start_new_entry or not self.blocks:
+            if self.blocks:
+                closed = self.blocks[-1]
+                fragment = closed.render("old")
+                self.closed_fragments.append((closed.id, fragment))
+                self._notify(closed.id, fragment)
+            self.blocks.append(TranscriptBlock(self.next_block_id, self._ts(now)))
+            self.next_block_id += 1
+
+        if html is None:
+            html = highlight_to_html(text)
+        suffix = " [partial]" if kind == "partial" else ""
+        block = self.blocks[-1]
+        block.lines.append(text + suffix)
+        block.html_lines.append(html + suffix)
 
         if lookup_decoded:
-            self.blocks[-1]["lookups"].append(lookup_decoded)
-
-        if len(self.blocks) > self.max_blocks:
-            self.blocks = self.blocks[-self.max_blocks:]
+            block.lookups.append(lookup_decoded)
 
         self.last_write_time = now
-        self._write_html()
-
-    def _write_html(self):
-        blocks = self.blocks
-        if LOWER_THIRD_MODE and len(blocks) > LOWER_THIRD_MAX_BLOCKS:
-            blocks = blocks[-LOWER_THIRD_MAX_BLOCKS:]
-
-        parts = []
-        parts.append("<!doctype html>")
-        parts.append("<html><head><meta charset='utf-8'>")
-        parts.append("""
-<style>
-  :root {
-    --bg: rgba(0,0,0,0.55);
-    --bubble: rgba(255,255,255,0.08);
-    --text: #ffffff;
-  }
-
-  html, body {
-    margin:0; padding:0;
-    width: 100%;
-    height: 100%;
-    overflow: hidden;
-    background: transparent;
-    font-family: Arial, sans-serif;
-    color: var(--text);
-  }
-
-  .stage {
-    position: relative;
-    width: 100%;
-    height: 100%;
-    padding: 18px 24px;
-    box-sizing: border-box;
-  }
-
-  .stack {
-    position: absolute;
-    left: 24px;
-    right: 24px;
-    bottom: 18px;
-    display: flex;
-    flex-direction: column;
-    gap: 10px;
-  }
-
-  .block {
-    padding: 12px 14px;
-    border-radius: 14px;
-    background: var(--bg);
-    box-shadow: 0 10px 24px rgba(0,0,0,0.35);
-    backdrop-filter: blur(6px);
-  }
-
-  .ts {
-    font-size: 18px;
-    opacity: 0.80;
-    margin-bottom: 6px;
-    font-weight: 700;
-    letter-spacing: 0.2px;
-  }
-
-  .line {
-    font-size: 28px;
-    line-height: 1.20;
-    margin: 0 0 6px 0;
-    font-weight: 700;
-    text-shadow: 0 2px 10px rgba(0,0,0,0.55);
-  }
-
-  .lookupline {
-    margin-top: 8px;
-    padding: 10px 12px;
-    border-radius: 12px;
-    background: var(--bubble);
-    font-size: 24px;
-    font-weight: 700;
-    text-shadow: 0 2px 10px rgba(0,0,0,0.55);
-  }
-
-  .hl { padding: 0 8px; border-radius: 10px; font-weight: 900; }
-  .hl.alert  { background: rgba(255, 0, 0, 0.35); }
-  .hl.unit   { background: rgba(255, 255, 0, 0.25); }
-  .hl.ten    { background: rgba(0, 200, 255, 0.22); }
-  .hl.loc    { background: rgba(200, 150, 255, 0.20); }
-  .hl.lookup { background: rgba(0, 255, 150, 0.18); }
-
-  .block[data-age="old"] { opacity: 0.82; }
-</style>
-</head><body>
-""".strip())
-
-        parts.append("<div class='stage'>")
-        parts.append("<div class='stack' id='stack'>")
-
-        for idx, b in enumerate(blocks):
-            age = "old" if idx < len(blocks) - 1 else "new"
-            parts.append(f"<div class='block' data-age='{age}'>")
-            parts.append(f"<div class='ts'>{htmlmod.escape(b['ts'])}</div>")
-
-            for line in b["lines"]:
-                parts.append(f"<div class='line'>{highlight_to_html(line)}</div>")
-
-            for decoded in b.get("lookups", []):
-                parts.append(
-                    f"<div class='lookupline'><span class='hl lookup'>INFO LOOKUP:</span> {htmlmod.escape(decoded)}</div>"
+        open_fragment = block.render("new")
+        self._notify(block.id, open_fragment)
+        if LOWER_THIRD_WRITE_FILE:
+            self._write_html(open_fragment)
+
+    def _notify(self, block_id: int, fragment: str) -> None:
+        for listener in self.listeners:
+            listener({"op": "block", "id": block_id, "html": fragment})
+
+    def snapshot(self) -> list[dict]:
+        """The visible blocks, oldest first, as overlay "block" events."""
+        out = [{"op": "block", "id": i, "html": h} for i, h in self.closed_fragments]
+        if self.blocks:
+            out.append({"op": "block", "id": self.blocks[-1].id, "html": self.blocks[-1].render("new")})
+        return out
+
+    def render_document(self, open_fragment: str | None = None) -> str:
+        if open_fragment is None:
+            open_fragment = self.blocks[-1].render("new") if self.blocks else ""
+        parts = [self.html_head]
+        parts.extend(h for _, h in self.closed_fragments)
+        if open_fragment:
+            parts.append(open_fragment)
+        parts.append(self.HTML_TAIL)
+        return "\n".join(parts)
+
+    def _write_html(self, open_fragment: str):
+        file_writer.submit(self.html_path, self.render_document(open_fragment), self._html_written)
+
+    def _html_written(self, path: Path) -> None:
+        for listener in self.file_listeners:
+            listener(path)
+
+# =============================================================================
+# OBS REFRESH (file:// browser sources)
+# =============================================================================
+class OBSRefreshController(threading.Thread):
+    """Debounced OBS browser-source refreshes over one obs-websocket client."""
+
+    def __init__(self, host: str, port: int, password: str,
+                 debounce: float, max_wait: float, max_hz: float):
+        super().__init__(name="obs-refresh", daemon=True)
+        self.host, self.port, self.password = host, port, password
+        self.debounce = debounce
+        self.max_wait = max(max_wait, debounce)
+        self.min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.cond = threading.Condition()
+        self.running = True
+        # source -> (first, last) unshown change; source -> last refresh
+        self.dirty: dict[str, tuple[float, float]] = {}
+        self.last_refresh: dict[str, float] = {}
+        self.client = None
+        self.next_connect = 0.0
+        self.backoff = 1.0
+        self.down_reported = False
+        self.notified = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.leading = 0
+        self.trailing = 0
+        self.failures = 0
+        self.connects = 0
+
+    def notify(self, source: str) -> None:
+        now = time.monotonic()
+        with self.cond:
+            self.notified += 1
+            first = self.dirty.get(source, (now, now))[0]
+            if source in self.dirty:
+                self.coalesced += 1
+            self.dirty[source] = (first, now)
+            self.cond.notify()
+
+    def _due(self, source: str) -> tuple[float, bool]:
+        """(when to refresh `source`, whether that is a leading-edge refresh)."""
+        first, last = self.dirty[source]
+        prev = self.last_refresh.get(source, float("-inf"))
+        leading = first - prev >= self.debounce
+        due = first if leading else min(last + self.debounce, first + self.max_wait)
+        due = max(due, prev + self.min_interval)
+        if self.client is None:
+            due = max(due, self.next_connect)
+        return due, leading
+
+    def run(self):
+        while True:
+            with self.cond:
+                if not self.running:
+                    return
+                if not self.dirty:
+                    self.cond.wait()
+                    continue
+                now = time.monotonic()
+                source, (due, leading) = min(
+                    ((s, self._due(s)) for s in self.dirty), key=lambda item: item[1][0]
                 )
+                if due > now:
+                    self.cond.wait(due - now)
+                    continue
+                changes = self.dirty.pop(source)
+            if self._refresh(source):
+                self.last_refresh[source] = time.monotonic()
+                self.refreshes += 1
+                if leading:
+                    self.leading += 1
+                else:
+                    self.trailing += 1
+            else:
+                with self.cond:
+                    # keep it pending (merged with anything newer) for the next connection
+                    first, last = self.dirty.get(source, changes)
+                    self.dirty[source] = (min(first, changes[0]), max(last, changes[1]))
+
+    def _connect(self) -> bool:
+        if self.client is not None:
+            return True
+        if obsws_python is None or time.monotonic() < self.next_connect:
+            return False
+        try:
+            self.client = obsws_python.ReqClient(
+                host=self.host, port=self.port, password=self.password, timeout=3
+            )
+        except Exception as e:
+            self.next_connect = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2.0, OBS_RECONNECT_MAX)
+            if not self.down_reported:
+                print(f"OBS refresh: cannot reach OBS at {self.host}:{self.port} ({e!r}); retrying")
+                self.down_reported = True
+            return False
+        self.connects += 1
+        self.backoff = 1.0
+        if self.down_reported or self.connects > 1:
+            print(f"OBS refresh: connected to {self.host}:{self.port}")
+        self.down_reported = False
+        return True
+
+    def _refresh(self, source: str) -> bool:
+        if not self._connect():
+            return False
+        try:
+            self.client.press_input_properties_button(inputName=source, propertyName="refreshnocache")
+            return True
+        except Exception as e:
+            self.failures += 1
+            print(f"OBS refresh: '{source}' failed ({e!r}); reconnecting")
+            with contextlib.suppress(Exception):
+                self.client.disconnect()
+            self.client = None
+            return False
+
+    def stop(self) -> None:
+        """Show whatever is still pending (if OBS is up), then end the thread."""
+        with self.cond:
+            self.running = False
+            pending, self.dirty = list(self.dirty), {}
+            self.cond.notify()
+        if self.is_alive():
+            self.join()
+        for source in pending:
+            if self._refresh(source):
+                self.refreshes += 1
+                self.trailing += 1
+        if self.client is not None:
+            with contextlib.suppress(Exception):
+                self.client.disconnect()
+            self.client = None
+
+    def stats(self) -> str:
+        return (
+            f"obs refresh: {self.refreshes} refreshes ({self.leading} leading, {self.trailing} trailing) "
+            f"for {self.notified} changes ({self.coalesced} coalesced), "
+            f"{self.failures} failures, {self.connects} connects"
+        )
+
+obs_refresh: OBSRefreshController | None = None
+if OBS_REFRESH_ENABLED:
+    if obsws_python is None:
+        print("OBS refresh: obsws-python not installed (pip install obsws-python); disabled")
+    else:
+        obs_refresh = OBSRefreshController(
+            OBS_HOST, OBS_PORT, OBS_PASSWORD,
+            OBS_REFRESH_DEBOUNCE_MS / 1000.0, OBS_REFRESH_MAX_WAIT_MS / 1000.0, OBS_REFRESH_MAX_HZ,
+        )
+
+# =============================================================================
+# OVERLAY SERVER (HTTP + Server-Sent Events)
+# =============================================================================
+class OverlayServer:
+    """Serves the lower third and pushes changed blocks over SSE."""
+
+    CLIENT_QUEUE_MAX = 256
+    HEARTBEAT_SECONDS = 15.0
+
+    def __init__(self, channels: list, host: str, port: int):
+        self.channels = {ch.name: ch for ch in channels}
+        self.default = channels[0]
+        self.host = host
+        self.port = port
+        self.clients: dict[asyncio.Queue, tuple[str, asyncio.StreamWriter]] = {}
+        self.server: asyncio.AbstractServer | None = None
+        self.events_pushed = 0
+        for ch in channels:
+            ch.full_logger.listeners.append(
+                lambda event, ch=ch: self.publish(ch, event)
+            )
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Overlay server: http://{self.host}:{self.port}/")
 
-            parts.append("</div>")
-
-        parts.append("</div></div>")
-
-        parts.append("""
-<script>
-(function(){
-  function pinBottom(){
-    try {
-      window.scrollTo(0, document.body.scrollHeight);
-    } catch(e){}
-  }
-  pinBottom();
-  setInterval(pinBottom, 250);
-  setInterval(function(){
-    location.reload();
-  }, 1500);
-})();
-</script>
-""".strip())
-
-        parts.append("</body></html>")
-        atomic_write(self.html_path, "\n".join(parts))
-
-obs_writer = OBSCaptionWriter()
-full_logger = FullTranscriptLogger(FULL_LOG_FILE, FULL_LOG_HTML_FILE, SILENCE_GAP_SECONDS)
+    def publish(self, ch, event: dict) -> None:
+        if not self.clients:
+            return
+        data = json.dumps(event)
+        now = time.monotonic()
+        for q, (name, writer) in list(self.clients.items()):
+            if name != ch.name:
+                continue
+            try:
+                q.put_nowait((now, data))
+                self.events_pushed += 1
+            except asyncio.QueueFull:
+                # hopelessly behind: drop it; EventSource reconnects and resyncs
+                del self.clients[q]
+                writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: str, ctype: str, body: bytes) -> None:
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+            f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request[1].split("?", 1)[0] if len(request) >= 2 else "/"
+            ch = self.default
+            first, _, rest = path.lstrip("/").partition("/")
+            if first in self.channels:
+                if path == f"/{first}":
+                    # relative asset/event URLs need the trailing slash
+                    writer.write(
+                        f"HTTP/1.1 301 Moved Permanently\r\nLocation: /{first}/\r\n"
+                        f"Content-Length: 0\r\nConnection: close\r\n\r\n".encode("latin-1")
+                    )
+                    await writer.drain()
+                    return
+                ch = self.channels[first]
+                path = "/" + rest
+            name = path.lstrip("/")
+            if path == "/events":
+                await self._stream(ch, writer)
+            elif path == "/metrics":
+                body = metrics_text().encode("utf-8")
+                self._respond(writer, "200 OK", "text/plain; version=0.0.4; charset=utf-8", body)
+            elif path in ("/", "/overlay"):
+                body = ch.full_logger.render_document().encode("utf-8")
+                self._respond(writer, "200 OK", "text/html; charset=utf-8", body)
+            elif name in OVERLAY_ASSETS:
+                ctype = "text/css" if name.endswith(".css") else "application/javascript"
+                body = (OVERLAY_ASSET_DIR / name).read_bytes()
+                self._respond(writer, "200 OK", f"{ctype}; charset=utf-8", body)
+            else:
+                self._respond(writer, "404 Not Found", "text/plain", b"not found")
+            await writer.drain()
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, ch, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+        )
+        logger = ch.full_logger
+        reset = {"op": "reset", "max": logger.visible_blocks, "blocks": logger.snapshot()}
+        writer.write(f"data: {json.dumps(reset)}\n\n".encode("utf-8"))
+        await writer.drain()
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.CLIENT_QUEUE_MAX)
+        self.clients[q] = (ch.name, writer)
+        try:
+            while not writer.is_closing():
+                try:
+                    published, data = await asyncio.wait_for(q.get(), self.HEARTBEAT_SECONDS)
+                    writer.write(f"data: {data}\n\n".encode("utf-8"))
+                    await writer.drain()
+                    ch.latency.record("overlay_push", time.monotonic() - published)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+        finally:
+            self.clients.pop(q, None)
+
+# =============================================================================
+# FILTER BACKENDS (one-pole IIR filters with state carried across blocks)
+# =============================================================================
+# Backends: pre_emphasis / high_pass / low_pass, each returning its carried state.
+
+class PythonFilterBackend:
+    name = "python"
+
+    @staticmethod
+    def pre_emphasis(x: np.ndarray, a: float, x_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        prev = x_prev
+        for i in range(len(x)):
+            xi = x[i]
+            y[i] = xi - a * prev
+            prev = xi
+        return y, float(prev)
+
+    @staticmethod
+    def high_pass(x: np.ndarray, a: float, y_prev: float, x_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        for i in range(len(x)):
+            xi = x[i]
+            yi = a * (y_prev + xi - x_prev)
+            y[i] = yi
+            y_prev = yi
+            x_prev = xi
+        return y, float(y_prev), float(x_prev)
+
+    @staticmethod
+    def low_pass(x: np.ndarray, b: float, y_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        for i in range(len(x)):
+            y_prev = y_prev + b * (x[i] - y_prev)
+            y[i] = y_prev
+        return y, float(y_prev)
+
+class LfilterFilterBackend:
+    """Whole-block filtering via scipy.signal.lfilter, state passed as `zi`."""
+    name = "lfilter"
+
+    @staticmethod
+    def pre_emphasis(x: np.ndarray, a: float, x_prev: float, out=None):
+        if not len(x):
+            return x, x_prev
+        last = float(x[-1])
+        first = x[0] - a * x_prev
+        y = np.empty_like(x) if out is None else out
+        # x[:-1] * a is taken before y is written, so out may be x
+        np.subtract(x[1:], x[:-1] * np.float32(a), out=y[1:])
+        y[0] = first
+        return y, last
+
+    @staticmethod
+    def high_pass(x: np.ndarray, a: float, y_prev: float, x_prev: float, out=None):
+        if not len(x):
+            return x, y_prev, x_prev
+        # y[n] = a*y[n-1] + a*x[n] - a*x[n-1]; transposed-form state z = a*(y - x)
+        b_coef = np.array([a, -a], dtype=x.dtype)
+        a_coef = np.array([1.0, -a], dtype=x.dtype)
+        zi = np.array([a * (y_prev - x_prev)], dtype=x.dtype)
+        x_last = float(x[-1])
+        y, _ = lfilter(b_coef, a_coef, x, zi=zi)
+        if out is not None:
+            out[:] = y
+            y = out
+        return y, float(y[-1]), x_last
+
+    @staticmethod
+    def low_pass(x: np.ndarray, b: float, y_prev: float, out=None):
+        if not len(x):
+            return x, y_prev
+        # y[n] = (1-b)*y[n-1] + b*x[n]; transposed-form state z = (1-b)*y
+        b_coef = np.array([b], dtype=x.dtype)
+        a_coef = np.array([1.0, -(1.0 - b)], dtype=x.dtype)
+        zi = np.array([(1.0 - b) * y_prev], dtype=x.dtype)
+        y, _ = lfilter(b_coef, a_coef, x, zi=zi)
+        if out is not None:
+            out[:] = y
+            y = out
+        return y, float(y[-1])
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _nb_pre_emphasis(x, y, a, prev):
+        for i in range(x.shape[0]):
+            xi = x[i]
+            y[i] = xi - a * prev
+            prev = xi
+        return prev
+
+    @numba.njit(cache=True)
+    def _nb_high_pass(x, y, a, y_prev, x_prev):
+        for i in range(x.shape[0]):
+            xi = x[i]
+            y_prev = a * (y_prev + xi - x_prev)
+            y[i] = y_prev
+            x_prev = xi
+        return y_prev, x_prev
+
+    @numba.njit(cache=True)
+    def _nb_low_pass(x, y, b, y_prev):
+        for i in range(x.shape[0]):
+            y_prev = y_prev + b * (x[i] - y_prev)
+            y[i] = y_prev
+        return y_prev
+
+class NumbaFilterBackend:
+    """The reference loops, JIT-compiled (first call pays the compile)."""
+    name = "numba"
+
+    @staticmethod
+    def pre_emphasis(x: np.ndarray, a: float, x_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        prev = _nb_pre_emphasis(x, y, a, x_prev)
+        return y, float(prev)
+
+    @staticmethod
+    def high_pass(x: np.ndarray, a: float, y_prev: float, x_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        y_prev, x_prev = _nb_high_pass(x, y, a, y_prev, x_prev)
+        return y, float(y_prev), float(x_prev)
+
+    @staticmethod
+    def low_pass(x: np.ndarray, b: float, y_prev: float, out=None):
+        y = np.empty_like(x) if out is None else out
+        y_prev = _nb_low_pass(x, y, b, y_prev)
+        return y, float(y_prev)
+
+def available_filter_backends() -> list:
+    backends = []
+    if numba is not None:
+        backends.append(NumbaFilterBackend)
+    if lfilter is not None:
+        backends.append(LfilterFilterBackend)
+    backends.append(PythonFilterBackend)
+    return backends
+
+def _time_filter_backend(backend, x: np.ndarray, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        y, _ = backend.pre_emphasis(x, PREEMPH, 0.0)
+        y, _, _ = backend.high_pass(y, 0.9, 0.0, 0.0)
+        backend.low_pass(y, 0.5, 0.0)
+    return (time.perf_counter() - t0) / rounds
+
+def select_filter_backend(name: str = FILTER_BACKEND, block: int = AUDIO_BLOCKSIZE):
+    backends = available_filter_backends()
+    if name != "auto":
+        for backend in backends:
+            if backend.name == name:
+                return backend
+        print(f"DSP: filter backend '{name}' unavailable, falling back to auto")
+
+    x = (np.random.default_rng(0).standard_normal(block) * 0.05).astype(np.float32)
+    timings = []
+    for backend in backends:
+        _time_filter_backend(backend, x, 1)  # warm-up / JIT compile
+        timings.append((_time_filter_backend(backend, x, FILTER_BENCH_ROUNDS), backend))
+    per_block, best = min(timings, key=lambda t: t[0])
+    summary = ", ".join(f"{b.name}={t * 1e6:.0f}us" for t, b in timings)
+    print(f"DSP: using '{best.name}' filters ({summary} per {block}-sample block)")
+    return best
+
+_filter_backend = None
+
+def get_filter_backend():
+    global _filter_backend
+    if _filter_backend is None:
+        _filter_backend = select_filter_backend()
+    return _filter_backend
+
+# =============================================================================
+# RESAMPLING (native capture rate -> SAMPLE_RATE)
+# =============================================================================
+class PolyphaseResampler:
+    """Streaming rational resampler (polyphase windowed-sinc FIR)."""
+
+    def __init__(self, in_rate: int, out_rate: int, cutoff_hz: float, taps: int = RESAMPLE_TAPS):
+        g = int(np.gcd(int(in_rate), int(out_rate)))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self.taps = taps
+        n = taps * self.up
+        fc = min(cutoff_hz, 0.45 * self.out_rate) / (self.in_rate * self.up)
+        m = np.arange(n) - (n - 1) / 2.0
+        h = 2.0 * fc * np.sinc(2.0 * fc * m) * np.kaiser(n, RESAMPLE_KAISER_BETA)
+        h *= self.up / h.sum()
+        # one reversed row of taps per phase
+        self.phases = np.ascontiguousarray(h.reshape(taps, self.up).T[:, ::-1], dtype=np.float32)
+        self.history = np.zeros(taps - 1, dtype=np.float32)
+        self.t = (taps - 1) * self.up  # next output, in upsampled samples from history[0]
+        self._offsets = np.arange(taps)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        buf = np.concatenate((self.history, x.astype(np.float32, copy=False)))
+        remaining = len(buf) * self.up - self.t
+        n = max(0, -(-remaining // self.down))
+        ts = self.t + self.down * np.arange(n)
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)[ts // self.up - (self.taps - 1)]
+        if self.up == 1:
+            y = windows @ self.phases[0]
+        else:
+            y = np.einsum("nk,nk->n", windows, self.phases[ts % self.up])
+        keep = self.taps - 1
+        self.t += n * self.down - (len(buf) - keep) * self.up
+        self.history = buf[len(buf) - keep:].copy()
+        return y.astype(np.float32, copy=False)
+
+def resample_cutoff_hz() -> float:
+    """LP_HZ when the tuner is on (it then skips its own low-pass)."""
+    return LP_HZ if TUNE_ENABLED else 0.45 * SAMPLE_RATE
+
+def capture_rate_for(device) -> int:
+    if CAPTURE_RATE is None:
+        return SAMPLE_RATE
+    if CAPTURE_RATE == "native":
+        return int(sd.query_devices(device, "input")["default_samplerate"])
+    return int(CAPTURE_RATE)
 
 # =============================================================================
 # RADIO TUNER DSP
 # =============================================================================
 class RadioTuner:
-    def __init__(self, sr: int):
+    def __init__(self, sr: int, backend=None, fused_low_pass: bool = False):
         self.sr = sr
+        self.backend = backend or get_filter_backend()
+        # True when a PolyphaseResampler upstream already applied LP_HZ
+        self.fused_low_pass = fused_low_pass
         self.hp_y = 0.0
         self.hp_x_prev = 0.0
         self.lp_y = 0.0
         self.pre_x_prev = 0.0
+        self.last_rms = 1.0
         self._update_coeffs()
 
     def _update_coeffs(self):
@@ -930,50 +2080,32 @@ class RadioTuner:
     def pre_emphasis(self, x: np.ndarray) -> np.ndarray:
         if not PREEMPH_ENABLED:
             return x
-        y = np.empty_like(x)
-        prev = self.pre_x_prev
-        a = PREEMPH
-        for i in range(len(x)):
-            xi = x[i]
-            y[i] = xi - a * prev
-            prev = xi
-        self.pre_x_prev = float(prev)
+        y, self.pre_x_prev = self.backend.pre_emphasis(x, PREEMPH, self.pre_x_prev)
         return y
 
     def high_pass(self, x: np.ndarray) -> np.ndarray:
-        y = np.empty_like(x)
-        a = self.hp_a
-        y_prev = self.hp_y
-        x_prev = self.hp_x_prev
-        for i in range(len(x)):
-            xi = x[i]
-            yi = a * (y_prev + xi - x_prev)
-            y[i] = yi
-            y_prev = yi
-            x_prev = xi
-        self.hp_y = float(y_prev)
-        self.hp_x_prev = float(x_prev)
+        y, self.hp_y, self.hp_x_prev = self.backend.high_pass(
+            x, self.hp_a, self.hp_y, self.hp_x_prev
+        )
         return y
 
     def low_pass(self, x: np.ndarray) -> np.ndarray:
-        y = np.empty_like(x)
-        b = self.lp_b
-        y_prev = self.lp_y
-        for i in range(len(x)):
-            xi = x[i]
-            y_prev = y_prev + b * (xi - y_prev)
-            y[i] = y_prev
-        self.lp_y = float(y_prev)
+        y, self.lp_y = self.backend.low_pass(x, self.lp_b, self.lp_y)
         return y
 
     def noise_gate(self, x: np.ndarray) -> np.ndarray:
         if not GATE_ENABLED:
             return x
         rms = float(np.sqrt(np.mean(x * x) + 1e-12))
+        self.last_rms = rms
         if rms < GATE_RMS:
             return x * GATE_ATTENUATION
         return x
 
+    def last_block_is_speech(self) -> bool:
+        """Whether the last processed block was above the gate threshold."""
+        return not (TUNE_ENABLED and GATE_ENABLED) or self.last_rms >= GATE_RMS
+
     def agc(self, x: np.ndarray) -> np.ndarray:
         if not AGC_ENABLED:
             return x
@@ -999,40 +2131,594 @@ class RadioTuner:
             return x
         x = self.pre_emphasis(x)
         x = self.high_pass(x)
-        x = self.low_pass(x)
+        if not self.fused_low_pass:
+            x = self.low_pass(x)
         x = self.noise_gate(x)
         x = self.agc(x)
         x = self.limiter(x)
         x = self.softclip(x)
         return np.clip(x, -1.0, 1.0)
 
-tuner = RadioTuner(SAMPLE_RATE)
+    def gate_agc_gain(self, x: np.ndarray) -> float:
+        """The noise gate and AGC as one gain, from a single RMS."""
+        rms = float(np.sqrt(np.dot(x, x) / max(1, len(x)) + 1e-12))
+        gain = 1.0
+        if GATE_ENABLED:
+            self.last_rms = rms
+            if rms < GATE_RMS:
+                gain = GATE_ATTENUATION
+                rms *= GATE_ATTENUATION
+        if AGC_ENABLED and rms > 1e-6:
+            gain *= min(AGC_MAX_GAIN, max(AGC_MIN_GAIN, AGC_TARGET_RMS / rms))
+        return gain
+
+    def process_inplace(self, x: np.ndarray) -> np.ndarray:
+        """process() writing every stage back into scratch buffer x."""
+        if not TUNE_ENABLED:
+            return x
+        if PREEMPH_ENABLED:
+            _, self.pre_x_prev = self.backend.pre_emphasis(x, PREEMPH, self.pre_x_prev, out=x)
+        _, self.hp_y, self.hp_x_prev = self.backend.high_pass(
+            x, self.hp_a, self.hp_y, self.hp_x_prev, out=x
+        )
+        if not self.fused_low_pass:
+            _, self.lp_y = self.backend.low_pass(x, self.lp_b, self.lp_y, out=x)
+        gain = self.gate_agc_gain(x)
+        if gain != 1.0:
+            np.multiply(x, np.float32(gain), out=x)
+        if LIMIT_ENABLED:
+            np.clip(x, -LIMIT_THRESHOLD, LIMIT_THRESHOLD, out=x)
+        if SOFTCLIP_ENABLED:
+            np.multiply(x, np.float32(2.2), out=x)
+            np.tanh(x, out=x)
+            np.multiply(x, np.float32(1.0 / np.tanh(2.2)), out=x)
+        np.clip(x, -1.0, 1.0, out=x)
+        return x
 
-def audio_callback(indata, frames, time_info, status):
-    if status:
-        pass
-    x = indata[:, 0].astype(np.float32)
+def block_to_pcm16(tuner: RadioTuner, x: np.ndarray) -> bytes:
     x = tuner.process(x)
-    pcm16 = (x * 32767.0).astype(np.int16).tobytes()
-    audio_q.put(pcm16)
+    return (x * 32767.0).astype(np.int16).tobytes()
+
+class PCM16Pool:
+    """Preallocated int16 ring that processed blocks are converted into."""
+
+    def __init__(self, frames: int):
+        self.buf = np.zeros(frames, dtype=np.int16)
+        self.pos = 0
+        # (start, uint8 view of the slot); its refcount tells if chunks are alive
+        self.live: deque[tuple[int, np.ndarray]] = deque()
+        self.exhausted = 0
+        self.live.append((0, self.buf[:0].view(np.uint8)))
+        self._idle_refs = sys.getrefcount(self.live[0][1])  # same expression as in take()
+        self.live.clear()
+
+    def take(self, n: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """(int16 slot, its uint8 view to export), or None if still in use."""
+        size = len(self.buf)
+        if n > size:
+            self.exhausted += 1
+            return None
+        start = self.pos if self.pos + n <= size else 0
+        span = (start - self.pos) % size + n  # a skipped tail counts as reused
+        live = self.live
+        while live and (live[0][0] - self.pos) % size < span:
+            if sys.getrefcount(live[0][1]) > self._idle_refs:
+                self.exhausted += 1
+                return None
+            live.popleft()
+        slot = self.buf[start:start + n]
+        view = slot.view(np.uint8)
+        live.append((start, view))
+        self.pos = start + n
+        return slot, view
+
+    def stats(self) -> str:
+        return f"pcm16 pool: {len(self.buf) / SAMPLE_RATE:.1f}s, {self.exhausted} blocks copied while full"
+
+def pcm16_pool_frames() -> int:
+    """Queue bound, VAD pre-roll and a coalescing window, plus a second of slack."""
+    ms = AUDIO_QUEUE_MAX_MS + VAD_PREROLL_MS + 2 * SEND_COALESCE_MS + 1000
+    return int(ms * SAMPLE_RATE / 1000) + DSP_BATCH_FRAMES
+
+def block_to_pcm16_inplace(tuner: RadioTuner, x: np.ndarray, pool: PCM16Pool) -> memoryview:
+    """block_to_pcm16 for the in-place path; x is overwritten."""
+    x = tuner.process_inplace(x)
+    np.multiply(x, np.float32(32767.0), out=x)
+    taken = pool.take(len(x))
+    if taken is None:
+        return x.astype(np.int16).tobytes()
+    slot, view = taken
+    np.copyto(slot, x, casting="unsafe")  # truncates like astype(np.int16)
+    return view.data
+
+# =============================================================================
+# AUDIO CAPTURE (ring buffer + DSP worker)
+# =============================================================================
+class AudioRingBuffer:
+    """Lock-free float32 ring: PortAudio callback writes, DSP worker reads."""
+
+    def __init__(self, capacity_frames: int, rate: int = SAMPLE_RATE):
+        self.size = int(capacity_frames)
+        self.rate = rate
+        self.buf = np.zeros(self.size, dtype=np.float32)
+        self.write_pos = 0
+        self.read_pos = 0
+        self.overflow_frames = 0
+        # (write_pos, capture time) as one tuple
+        self.last_stamp = (0, time.monotonic())
+
+    def available(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def write(self, x: np.ndarray, captured: float | None = None) -> None:
+        n = len(x)
+        free = self.size - (self.write_pos - self.read_pos)
+        if n > free:
+            # reader fell behind: keep what fits, count the rest as dropped
+            self.overflow_frames += n - free
+            n = free
+        if n <= 0:
+            return
+        i = self.write_pos % self.size
+        first = min(n, self.size - i)
+        self.buf[i:i + first] = x[:first]
+        if first < n:
+            self.buf[:n - first] = x[first:n]
+        self.write_pos += n
+        self.last_stamp = (self.write_pos, captured if captured is not None else time.monotonic())
+
+    def capture_time(self, pos: int) -> float:
+        """Approximate capture time of the frame before cursor `pos`."""
+        stamp_pos, stamp_time = self.last_stamp
+        return stamp_time - (stamp_pos - pos) / self.rate
+
+    def read(self, max_frames: int, out: np.ndarray | None = None) -> np.ndarray:
+        n = min(max_frames, self.available())
+        out = np.empty(n, dtype=np.float32) if out is None else out[:n]
+        i = self.read_pos % self.size
+        first = min(n, self.size - i)
+        out[:first] = self.buf[i:i + first]
+        if first < n:
+            out[first:] = self.buf[:n - first]
+        self.read_pos += n
+        return out
+
+class DSPWorker(threading.Thread):
+    """Drains a channel's capture ring in DSP_BATCH_FRAMES batches off the audio thread."""
+
+    def __init__(self, ch: "Channel", batch_frames: int):
+        super().__init__(name=f"dsp-{ch.name}", daemon=True)
+        self.ch = ch
+        self.ring = ch.ring
+        self.batch_frames = batch_frames
+        self.poll_seconds = batch_frames / self.ring.rate / 4.0
+        self.batches = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.ring.available() < self.batch_frames:
+                self._stop_event.wait(self.poll_seconds)
+                continue
+            x = self.ring.read(self.batch_frames, self.ch.scratch(self.batch_frames))
+            captured = self.ring.capture_time(self.ring.read_pos)
+            self.ch.push_audio(x, captured, owned=True)
+            self.batches += 1
+
+# =============================================================================
+# AUDIO HAND-OFF (capture thread -> event loop)
+# =============================================================================
+class VoiceGate:
+    """Decides which processed chunks go upstream (pre-roll and hangover)."""
+
+    def __init__(self, hangover_ms: float, preroll_ms: float):
+        bytes_per_ms = 2 * CHANNELS * SAMPLE_RATE / 1000.0
+        self.bytes_per_second = bytes_per_ms * 1000.0
+        self.hangover_bytes = int(hangover_ms * bytes_per_ms)
+        self.preroll_bytes = int(preroll_ms * bytes_per_ms)
+        self.is_open = False
+        self.unvoiced_bytes = 0
+        self.preroll: deque[tuple[bytes, bool, float]] = deque()
+        self.preroll_nbytes = 0
+        self.openings = 0
+        self.sent_bytes = 0
+        self.gated_bytes = 0
+
+    def process(self, pcm: bytes, voiced: bool, speech: bool, captured: float) -> list:
+        """Returns the (pcm, speech, captured) chunks to send now."""
+        item = (pcm, speech, captured)
+        if voiced:
+            self.unvoiced_bytes = 0
+            if not self.is_open:
+                self.is_open = True
+                self.openings += 1
+                out = list(self.preroll)
+                out.append(item)
+                self.preroll.clear()
+                self.preroll_nbytes = 0
+                self.sent_bytes += sum(len(c[0]) for c in out)
+                return out
+        elif self.is_open:
+            self.unvoiced_bytes += len(pcm)
+            if self.unvoiced_bytes > self.hangover_bytes:
+                self.is_open = False
+        if self.is_open:
+            self.sent_bytes += len(pcm)
+            return [item]
+        self.preroll.append(item)
+        self.preroll_nbytes += len(pcm)
+        while self.preroll_nbytes > self.preroll_bytes:
+            old = self.preroll.popleft()[0]
+            self.preroll_nbytes -= len(old)
+            self.gated_bytes += len(old)
+        return []
+
+    def stats(self) -> str:
+        total = max(1, self.sent_bytes + self.gated_bytes)
+        bps = self.bytes_per_second
+        return (
+            f"vad: {self.openings} speech bursts, sent {self.sent_bytes / bps:.0f}s, "
+            f"gated {self.gated_bytes / bps:.0f}s ({100 * self.gated_bytes / total:.0f}% / "
+            f"{self.gated_bytes / 1e6:.1f} MB saved)"
+        )
+
+class AsyncAudioBridge:
+    """Bounded hand-off of PCM chunks from the DSP thread to the asyncio sender."""
+
+    def __init__(self, max_ms: float = 0.0, policy: str = "drop_oldest"):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # (enqueue loop time, pcm, is speech, capture time of its last frame)
+        self.chunks: deque[tuple[float, bytes, bool, float]] = deque()
+        self.nbytes = 0
+        self._ready: asyncio.Event | None = None
+        self.bytes_per_ms = 2 * CHANNELS * SAMPLE_RATE / 1000.0
+        self.max_bytes = int(max_ms * self.bytes_per_ms)
+        self.policy = policy
+        self._silent_chunks = 0
+        self.high_water_bytes = 0
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._ready = asyncio.Event()
+
+    def put(self, chunk: bytes, speech: bool = True, captured: float | None = None) -> None:
+        loop = self.loop
+        if loop is None:
+            return
+        if captured is None:
+            captured = time.monotonic()
+        try:
+            loop.call_soon_threadsafe(self._push, chunk, speech, captured)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def _push(self, chunk: bytes, speech: bool, captured: float) -> None:
+        if self.max_bytes and self.nbytes + len(chunk) > self.max_bytes:
+            if not self._make_room(len(chunk), speech):
+                self._count_drop(len(chunk))
+                return
+        self.chunks.append((self.loop.time(), chunk, speech, captured))
+        self.nbytes += len(chunk)
+        if not speech:
+            self._silent_chunks += 1
+        self.high_water_bytes = max(self.high_water_bytes, self.nbytes)
+        self._ready.set()
+
+    def _count_drop(self, nbytes: int) -> None:
+        self.dropped_bytes += nbytes
+        self.dropped_chunks += 1
+
+    def _make_room(self, incoming: int, speech: bool) -> bool:
+        """Apply the overflow policy. False means drop the incoming chunk."""
+        if self.policy == "drop_newest":
+            return False
+        if self.policy == "speech_only":
+            if not speech:
+                return False
+            if self._silent_chunks:
+                kept = deque()
+                for item in self.chunks:
+                    if item[2]:
+                        kept.append(item)
+                    else:
+                        self.nbytes -= len(item[1])
+                        self._count_drop(len(item[1]))
+                self.chunks = kept
+                self._silent_chunks = 0
+        while self.chunks and self.nbytes + incoming > self.max_bytes:
+            _, old, old_speech, _ = self.chunks.popleft()
+            self.nbytes -= len(old)
+            if not old_speech:
+                self._silent_chunks -= 1
+            self._count_drop(len(old))
+        return True
+
+    def qsize(self) -> int:
+        return len(self.chunks)
+
+    def stats(self) -> str:
+        ms = self.bytes_per_ms
+        return (
+            f"queue depth {self.nbytes / ms:.0f}ms ({len(self.chunks)} chunks) "
+            f"high-water {self.high_water_bytes / ms:.0f}ms "
+            f"dropped {self.dropped_bytes / ms:.0f}ms ({self.dropped_chunks} chunks, {self.policy})"
+        )
+
+    async def get_batch(self, min_bytes: int) -> tuple[float, float, list[bytes]]:
+        """(oldest enqueue time, newest capture time, chunks) once `min_bytes` are queued."""
+        while not self.chunks or self.nbytes < min_bytes:
+            self._ready.clear()
+            await self._ready.wait()
+        oldest = self.chunks[0][0]
+        captured = self.chunks[-1][3]
+        out = [c for _, c, _, _ in self.chunks]
+        self.chunks.clear()
+        self.nbytes = 0
+        self._silent_chunks = 0
+        return oldest, captured, out
+
+class UplinkStats:
+    """Frame counts plus send-wait and result latencies."""
+
+    def __init__(self, latency: LatencyTracer):
+        self.latency = latency
+        self.frames = 0
+        self.bytes = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.lag_total = 0.0
+        self.lag_count = 0
+        self.lag_max = 0.0
+        self.started = time.monotonic()
+        self.last_send = self.started
+        self.reset_stream()
+
+    def reset_stream(self) -> None:
+        """Call on every new connection: Deepgram timestamps restart at 0."""
+        self.stream_seconds = 0.0
+        self._sent_marks: deque[tuple[float, float, float]] = deque(maxlen=4096)
+
+    def on_frame(self, nbytes: int, waited: float, now: float, captured: float | None = None) -> None:
+        self.frames += 1
+        self.bytes += nbytes
+        self.last_send = now
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.stream_seconds += nbytes / (2 * CHANNELS * SAMPLE_RATE)
+        self._sent_marks.append((self.stream_seconds, now, captured if captured is not None else now))
+
+    def on_result(self, audio_end: float, now: float) -> float | None:
+        """Capture time of the audio a result's start+duration covers, or None."""
+        for stream_end, sent_at, captured in self._sent_marks:
+            if stream_end >= audio_end:
+                lag = now - sent_at
+                self.lag_total += lag
+                self.lag_count += 1
+                self.lag_max = max(self.lag_max, lag)
+                self.latency.record("asr", lag)
+                self.latency.record("capture_to_result", now - captured)
+                return captured
+        return None
+
+    def summary(self) -> str:
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        frames = max(1, self.frames)
+        lags = max(1, self.lag_count)
+        return (
+            f"uplink: window={SEND_COALESCE_MS}ms "
+            f"{self.frames / elapsed:.1f} frames/s avg {self.bytes / frames:.0f} B | "
+            f"send wait avg {1000 * self.wait_total / frames:.0f}ms max {1000 * self.wait_max:.0f}ms | "
+            f"result lag avg {1000 * self.lag_total / lags:.0f}ms max {1000 * self.lag_max:.0f}ms"
+        )
+
+# =============================================================================
+# UPLINK ENCODING (optional Ogg/Opus or FLAC instead of raw PCM)
+# =============================================================================
+def effective_uplink_encoding(encoding: str) -> str:
+    """`encoding`, or linear16 when PyAV is not there to produce it."""
+    return encoding if encoding == "linear16" or av is not None else "linear16"
+
+class UplinkEncoder:
+    """Turns coalesced PCM16 frames into a compressed byte stream."""
+
+    FORMATS = {"opus": ("ogg", "libopus"), "flac": ("flac", "flac")}
+
+    def __init__(self, encoding: str, name: str):
+        if encoding not in self.FORMATS:
+            raise ValueError(f"unknown UPLINK_ENCODING {encoding!r}")
+        self.encoding = encoding
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"encode-{name}")
+        self.layout = "mono" if CHANNELS == 1 else "stereo"
+        self._out = bytearray()
+        self._container = None
+        self._stream = None
+        self._pts = 0
+        self.streams = 0
+        self.pcm_bytes = 0
+        self.out_bytes = 0
+        self.encode_seconds = 0.0
+
+    def write(self, data) -> int:
+        """File-like sink for the PyAV muxer."""
+        self._out += data
+        return len(data)
+
+    def _open(self) -> None:
+        fmt, codec = self.FORMATS[self.encoding]
+        # flush every packet (and 20 ms Ogg pages) so nothing sits in the muxer
+        options = {"flush_packets": "1"}
+        if fmt == "ogg":
+            options["page_duration"] = "20000"
+        self._container = av.open(self, mode="w", format=fmt, options=options, buffer_size=4096)
+        self._stream = self._container.add_stream(codec, rate=SAMPLE_RATE)
+        self._stream.layout = self.layout
+        if codec == "libopus":
+            self._stream.bit_rate = UPLINK_OPUS_BITRATE
+            self._stream.codec_context.options = {"application": "voip", "frame_duration": "20"}
+        self._pts = 0
+        self.streams += 1
+
+    def encode(self, pcm: bytes) -> bytes:
+        t0 = time.perf_counter()
+        if self._container is None:
+            self._open()
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(1, -1)
+        frame = av.AudioFrame.from_ndarray(samples, format="s16", layout=self.layout)
+        frame.sample_rate = SAMPLE_RATE
+        frame.pts = self._pts
+        self._pts += samples.shape[1] // CHANNELS
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+        out = bytes(self._out)
+        self._out.clear()
+        self.encode_seconds += time.perf_counter() - t0
+        self.pcm_bytes += len(pcm)
+        self.out_bytes += len(out)
+        return out
+
+    def reset(self) -> None:
+        """Abandon the current stream; the next encode() writes fresh headers."""
+        if self._container is not None:
+            with contextlib.suppress(Exception):
+                self._container.close()
+            self._container = None
+            self._stream = None
+        self._out.clear()
+
+    def close(self) -> None:
+        self.executor.submit(self.reset)
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> str:
+        audio_s = self.pcm_bytes / (2 * CHANNELS * SAMPLE_RATE)
+        ratio = self.pcm_bytes / self.out_bytes if self.out_bytes else 0.0
+        cpu = 1000 * self.encode_seconds / audio_s if audio_s else 0.0
+        return (
+            f"encoder: {self.encoding} {ratio:.1f}x ({self.pcm_bytes / 1e6:.1f} MB PCM -> "
+            f"{self.out_bytes / 1e6:.2f} MB sent), {cpu:.1f} ms CPU per audio second, "
+            f"{self.streams} streams"
+        )
+
+async def encode_frame(ch: "Channel", pcm: bytes) -> bytes:
+    """What goes on the wire for `pcm`: itself, or its encoded bytes."""
+    if ch.encoder is None:
+        return pcm
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(ch.encoder.executor, ch.encoder.encode, pcm)
+
+async def reset_encoder(ch: "Channel") -> None:
+    if ch.encoder is not None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(ch.encoder.executor, ch.encoder.reset)
 
 # =============================================================================
 # POST-PROCESS PIPELINE
 # =============================================================================
+class ProcessedTranscript(NamedTuple):
+    raw: str
+    spans: tuple[Span, ...]
+    text: str      # raw transcript text (text log, store, index)
+    annotated: str # plain text with code annotations (console, captions)
+    html: str      # highlighted + annotated HTML fragment (lower third)
+    alert: bool
+
+def process_transcript(raw: str) -> ProcessedTranscript:
+    """Scan once; annotation, alert flag and HTML all come from the same spans."""
+    sync_tables()
+    cached = process_cache.get(raw)
+    if cached is not None:
+        return cached
+    spans = scan_transcript(raw)
+    result = ProcessedTranscript(
+        raw=raw,
+        spans=tuple(spans),
+        text=raw,
+        annotated=render_annotated(raw, spans),
+        html=render_html(raw, spans),
+        alert=any(s.alert for s in spans),
+    )
+    process_cache.put(raw, result)
+    return result
+
 def post_process_transcript(text: str) -> str:
     if not text:
         return text
-    text = annotate_im_shorthand(text)
-    text = annotate_codes(text)
-    text = annotate_pc_codes(text)
-    return text
+    return process_transcript(text).annotated
 
 # =============================================================================
 # DEEPGRAM MESSAGE PARSING (fix channel dict/list issue)
 # =============================================================================
-def extract_transcript_and_final(data: dict) -> tuple[str, bool]:
-    is_final = bool(data.get("is_final", False) or data.get("speech_final", False))
+def select_json_loads(name: str = JSON_BACKEND):
+    if name in ("auto", "orjson") and orjson is not None:
+        return orjson.loads
+    if name == "orjson":
+        print("JSON: orjson not installed, using the stdlib parser")
+    return json.loads
+
+json_loads = select_json_loads()
+
+# Deepgram puts "type" first, so non-Results messages skip the parse
+_MSG_TYPE = re.compile(r'"type"\s*:\s*"(\w+)"')
+MSG_TYPE_PEEK = 64
+
+def peek_message_type(msg: str | bytes) -> str | None:
+    if isinstance(msg, bytes):
+        msg = msg[:MSG_TYPE_PEEK].decode("utf-8", errors="replace")
+    m = _MSG_TYPE.search(msg, 0, MSG_TYPE_PEEK)
+    return m.group(1) if m else None
+
+class ASRResult(NamedTuple):
+    transcript: str
+    is_final: bool
+    start: float | None
+    duration: float | None
+    words: list | None  # Deepgram `words` of the first alternative, if sent
+
+    @property
+    def audio_end(self) -> float | None:
+        if self.start is None or self.duration is None:
+            return None
+        return self.start + self.duration
+
+    def lookup_words(self) -> list[LookupWord]:
+        return lookup_words(self.words, self.transcript, self.start or 0.0)
+
+def decode_message(msg: str | bytes) -> tuple[str, ASRResult | None]:
+    """(message type, result); result is None unless it has a transcript."""
+    kind = peek_message_type(msg)
+    if kind is not None and kind != "Results":
+        return kind, None
+    try:
+        data = json_loads(msg)
+    except ValueError:
+        return "invalid", None
+    if not isinstance(data, dict):
+        return "invalid", None
+    kind = data.get("type", "Results")
+    if kind != "Results":
+        return kind, None
+    alt = _first_alternative(data)
+    if alt is None:
+        return kind, None
+    transcript = (alt.get("transcript") or "").strip()
+    if not transcript:
+        return kind, None
+    start = data.get("start")
+    duration = data.get("duration")
+    return kind, ASRResult(
+        transcript,
+        bool(data.get("is_final", False) or data.get("speech_final", False)),
+        float(start) if start is not None else None,
+        float(duration) if duration is not None else None,
+        alt.get("words"),
+    )
 
+def _first_alternative(data: dict) -> dict | None:
     channel = data.get("channel")
     alts = None
 
@@ -1046,98 +2732,707 @@ def extract_transcript_and_final(data: dict) -> tuple[str, bool]:
     if not alts:
         alts = data.get("alternatives")
 
-    if not isinstance(alts, list) or not alts:
-        return "", is_final
+    if not isinstance(alts, list) or not alts or not isinstance(alts[0], dict):
+        return None
+    return alts[0]
 
-    transcript = (alts[0].get("transcript") or "").strip()
-    return transcript, is_final
+# =============================================================================
+# TRACE RECORDING (input for replay.py)
+# =============================================================================
+class TraceRecorder:
+    """Writes TRACE_DIR/<start time>/messages.jsonl and audio.wav."""
+
+    def __init__(self, root: Path, record_pcm: bool):
+        self.dir = root / time.strftime("%Y%m%d-%H%M%S")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.t0 = time.monotonic()
+        self.messages = (self.dir / "messages.jsonl").open("a", encoding="utf-8", buffering=1)
+        self.wav = None
+        if record_pcm:
+            self.wav = wave.open(str(self.dir / "audio.wav"), "wb")
+            self.wav.setnchannels(CHANNELS)
+            self.wav.setsampwidth(2)
+            self.wav.setframerate(SAMPLE_RATE)
+        print(f"Recording trace to {self.dir}")
+
+    def _line(self, record: dict) -> None:
+        record["t"] = round(time.monotonic() - self.t0, 4)
+        self.messages.write(json.dumps(record) + "\n")
+
+    def on_connect(self) -> None:
+        self._line({"event": "connect"})
+
+    def on_message(self, msg: str | bytes) -> None:
+        if isinstance(msg, bytes):
+            msg = msg.decode("utf-8", errors="replace")
+        self._line({"msg": msg})
+
+    def on_sent(self, frame: bytes) -> None:
+        if self.wav is not None:
+            self.wav.writeframesraw(frame)
+
+    def close(self) -> None:
+        self.messages.close()
+        if self.wav is not None:
+            self.wav.close()
 
 # =============================================================================
-# WEBSOCKET TASKS
+# CONNECTION SUPERVISION (reconnect + audio replay)
 # =============================================================================
-async def sender(ws):
-    while True:
-        chunk = await asyncio.to_thread(audio_q.get)
-        await ws.send(chunk)
+class ReplayBuffer:
+    """The last `seconds` of PCM sent upstream, keyed by stream time."""
+
+    def __init__(self, seconds: float):
+        self.max_bytes = int(seconds * 2 * CHANNELS * SAMPLE_RATE)
+        self.reset()
+
+    def reset(self) -> None:
+        self.frames: deque[tuple[float, bytes]] = deque()
+        self.nbytes = 0
+        self.stream_seconds = 0.0
+        self.acked_until = 0.0
+
+    def add(self, frame: bytes) -> None:
+        self.stream_seconds += len(frame) / (2 * CHANNELS * SAMPLE_RATE)
+        self.frames.append((self.stream_seconds, frame))
+        self.nbytes += len(frame)
+        while self.nbytes > self.max_bytes and len(self.frames) > 1:
+            _, old = self.frames.popleft()
+            self.nbytes -= len(old)
+
+    def ack(self, audio_end: float) -> None:
+        self.acked_until = max(self.acked_until, audio_end)
+
+    def take_unacked(self) -> tuple[list[bytes], float]:
+        """(unacked frames, seconds at their head already covered); starts a fresh clock."""
+        frames = []
+        covered = 0.0
+        for end, f in self.frames:
+            if end <= self.acked_until:
+                continue
+            if not frames:
+                start = end - len(f) / (2 * CHANNELS * SAMPLE_RATE)
+                covered = max(0.0, self.acked_until - start)
+            frames.append(f)
+        self.reset()
+        return frames, covered
+
+class TranscriptDeduper:
+    """Drops results for audio the old connection already finalized."""
+
+    def __init__(self, history: int = 20):
+        self.recent: deque[tuple[str, ...]] = deque(maxlen=history)
+        self.covered = 0.0
+        self.active_until = 0.0
+        self.suppressed = 0
+
+    @staticmethod
+    def _tokens(text: str) -> tuple[str, ...]:
+        return tuple(re.findall(r"[a-z0-9]+", text.lower()))
+
+    @staticmethod
+    def _contains(tokens: tuple[str, ...], seq: tuple[str, ...]) -> bool:
+        n = len(seq)
+        return any(tokens[i:i + n] == seq for i in range(len(tokens) - n + 1))
+
+    def arm(self, covered: float, seconds: float) -> None:
+        """New stream after a replay whose first `covered` seconds were heard."""
+        self.covered = covered
+        self.active_until = time.monotonic() + seconds
+
+    def is_duplicate(self, result: ASRResult) -> bool:
+        tokens = self._tokens(result.transcript)
+        if not tokens:
+            return False
+        if result.start is not None:
+            duplicate = result.start + (result.duration or 0.0) / 2 < self.covered
+        else:
+            duplicate = time.monotonic() < self.active_until and any(
+                self._contains(r, tokens) for r in self.recent
+            )
+        if duplicate:
+            if result.is_final:
+                self.suppressed += 1
+            return True
+        if result.is_final:
+            self.recent.append(tokens)
+        return False
 
-async def receiver(ws):
-    last_interim_best: str = ""
-    last_interim_update_time = 0.0
-    last_forced_log_time = 0.0
+class ConnectionStats:
+    def __init__(self, deduper: TranscriptDeduper):
+        self.deduper = deduper
+        self.connects = 0
+        self.reconnects = 0
+        self.last_reconnect_seconds = 0.0
+        self.total_downtime = 0.0
+        self.replayed_seconds = 0.0
+
+    def on_reconnect(self, downtime: float, replayed: float) -> None:
+        self.reconnects += 1
+        self.last_reconnect_seconds = downtime
+        self.total_downtime += downtime
+        self.replayed_seconds += replayed
+
+    def summary(self) -> str:
+        return (
+            f"connection: {self.reconnects} reconnects "
+            f"(last {self.last_reconnect_seconds:.1f}s, total down {self.total_downtime:.1f}s), "
+            f"replayed {self.replayed_seconds:.1f}s audio, "
+            f"{self.deduper.suppressed} duplicate finals dropped"
+        )
 
-    async for msg in ws:
+async def replay_unacked_audio(ch: "Channel", ws) -> tuple[float, float]:
+    """Resend unfinalized audio; returns (seconds replayed, seconds covered)."""
+    frames, covered = ch.replay_buffer.take_unacked()
+    for frame in frames:
+        ch.replay_buffer.add(frame)
+        data = await encode_frame(ch, frame)
+        if data:
+            await ws.send(data)
+        ch.uplink.on_frame(len(frame), 0.0, time.monotonic())
+    return ch.replay_buffer.stream_seconds, covered
+
+async def keepalive(ch: "Channel", ws):
+    msg = json.dumps({"type": "KeepAlive"})
+    while True:
+        await asyncio.sleep(KEEPALIVE_SECONDS / 2)
+        if time.monotonic() - ch.uplink.last_send >= KEEPALIVE_SECONDS:
+            await ws.send(msg)
+
+async def run_session(ch: "Channel", ws):
+    """Run sender/receiver/keepalive until any of them stops or fails."""
+    tasks = [
+        asyncio.create_task(sender(ch, ws)),
+        asyncio.create_task(receiver(ch, ws)),
+        asyncio.create_task(keepalive(ch, ws)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for t in done:
+        t.result()  # re-raise the failure, if any
+
+async def run_connection(ch: "Channel", headers: dict):
+    """Keep a channel's Deepgram stream up, reconnecting with backoff."""
+    backoff = RECONNECT_BACKOFF_INITIAL
+    lost_at: float | None = None
+    while True:
         try:
-            data = json.loads(msg)
-        except json.JSONDecodeError:
-            continue
-
-        transcript_raw, is_final = extract_transcript_and_final(data)
-        if not transcript_raw:
-            continue
-
-        decoded_lookup = None
-        if is_final:
-            decoded_lookup = lookup_decoder.process_final(transcript_raw, time.time())
+            async with websockets.connect(ch.dg_url, additional_headers=headers) as ws:
+                ch.conn_stats.connects += 1
+                if ch.trace is not None:
+                    ch.trace.on_connect()
+                backoff = RECONNECT_BACKOFF_INITIAL
+                downtime = time.monotonic() - lost_at if lost_at is not None else 0.0
+                ch.uplink.reset_stream()
+                ch.lookup_decoder.new_stream(downtime)
+                await reset_encoder(ch)
+                if lost_at is not None:
+                    replayed, covered = await replay_unacked_audio(ch, ws)
+                    ch.deduper.arm(covered, replayed + DEDUPE_GRACE_SECONDS)
+                    ch.conn_stats.on_reconnect(downtime, replayed)
+                    print(f"[{ch.name}] Reconnected after {downtime:.1f}s, replayed {replayed:.1f}s of audio")
+                    lost_at = None
+                await run_session(ch, ws)
+            reason = "closed by server"
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            reason = repr(e)
+        if lost_at is None:
+            lost_at = time.monotonic()
+        print(f"[{ch.name}] Deepgram connection lost ({reason}); retrying in {backoff:.1f}s")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2.0, RECONNECT_BACKOFF_MAX)
 
-        transcript = post_process_transcript(transcript_raw)
+# =============================================================================
+# WEBSOCKET TASKS
+# =============================================================================
+async def sender(ch: "Channel", ws):
+    window_bytes = 2 * CHANNELS * SAMPLE_RATE * SEND_COALESCE_MS // 1000
+    while True:
+        oldest, captured, chunks = await ch.audio_q.get_batch(window_bytes)
+        frame = bytes(chunks[0]) if len(chunks) == 1 else b"".join(chunks)
+        ch.replay_buffer.add(frame)
+        data = await encode_frame(ch, frame)
+        send_start = time.monotonic()
+        if data:
+            await ws.send(data)
+        if ch.trace is not None:
+            ch.trace.on_sent(frame)
+        now = time.monotonic()
+        waited = ch.audio_q.loop.time() - oldest
+        ch.latency.record("queue_wait", waited)
+        ch.latency.record("send", now - send_start)
+        ch.uplink.on_frame(len(frame), waited, now, captured)
+
+def print_stats():
+    for ch in channels:
+        for line in ch.stats_lines():
+            print(f"[{ch.name}] {line}")
+    print(f"transcript cache: {process_cache.stats()}")
+    print(f"highlight cache: {highlight_cache.stats()}")
+    print(file_writer.stats())
+    if obs_refresh is not None:
+        print(obs_refresh.stats())
+    print(log_appender.stats())
+    print(io_latency.summary())
+
+def metrics_text() -> str:
+    """Prometheus exposition for the overlay server's /metrics route."""
+    name = LatencyTracer.PROM_NAME
+    out = [
+        f"# HELP {name} Pipeline stage latency from audio capture to caption output.",
+        f"# TYPE {name} histogram",
+    ]
+    for ch in channels:
+        out += ch.latency.prometheus_histograms(ch.name)
+    out += io_latency.prometheus_histograms("all")
+    out.append(f"# TYPE {LatencyTracer.PROM_QUANTILE_NAME} gauge")
+    for ch in channels:
+        out += ch.latency.prometheus_quantiles(ch.name)
+    out += io_latency.prometheus_quantiles("all")
+    counters = {
+        "pscanner_uplink_frames_total": lambda ch: ch.uplink.frames,
+        "pscanner_uplink_bytes_total": lambda ch: ch.uplink.bytes,
+        "pscanner_audio_dropped_bytes_total": lambda ch: ch.audio_q.dropped_bytes,
+        "pscanner_reconnects_total": lambda ch: ch.conn_stats.reconnects,
+        "pscanner_messages_total": lambda ch: sum(ch.message_counts.values()),
+        "pscanner_vad_gated_bytes_total": lambda ch: ch.vad.gated_bytes if ch.vad else 0,
+        "pscanner_encoder_output_bytes_total": lambda ch: ch.encoder.out_bytes if ch.encoder else 0,
+    }
+    for cname, get in counters.items():
+        out.append(f"# TYPE {cname} counter")
+        out += [f'{cname}{{channel="{ch.name}"}} {get(ch)}' for ch in channels]
+    out.append("# TYPE pscanner_file_writes_total counter")
+    out.append(f"pscanner_file_writes_total {file_writer.writes}")
+    if obs_refresh is not None:
+        out.append("# TYPE pscanner_obs_refreshes_total counter")
+        out.append(f"pscanner_obs_refreshes_total {obs_refresh.refreshes}")
+    return "\n".join(out) + "\n"
+
+async def report_uplink_stats():
+    while True:
+        await asyncio.sleep(UPLINK_STATS_SECONDS)
+        print_stats()
+
+class TranscriptHandler:
+    """Caption/log side effects for a channel's finals and (coalesced) interims."""
+
+    def __init__(self, ch: "Channel"):
+        self.ch = ch
+        self.last_interim_best: ProcessedTranscript | None = None
+        self.last_interim_update_time = 0.0
+        self.last_forced_log_time = 0.0
+
+    @staticmethod
+    def _caption(processed: ProcessedTranscript) -> str:
+        return f"🚨 {processed.annotated}" if processed.alert else processed.annotated
+
+    def on_final(self, transcript_raw: str, words: list[LookupWord]) -> None:
+        ch = self.ch
+        ch.sync_lookup_clock()
+        decoded_lookup = ch.lookup_decoder.process_words(words)
+        processed = process_transcript(transcript_raw)
+        print(f"{ch.prefix}{processed.annotated}")
+
+        caption_text = self._caption(processed)
+        ch.obs_writer.write_final(caption_text)
+        ch.obs_writer.update_live(caption_text)
+
+        ch.full_logger.add_entry(
+            processed.text,
+            kind="final",
+            lookup_decoded=decoded_lookup,
+            html=processed.html,
+            spans=processed.spans,
+        )
+        self.last_interim_best = None
+        self.last_interim_update_time = 0.0
+
+    def on_interim(self, transcript_raw: str, words: list[LookupWord]) -> None:
+        processed = process_transcript(transcript_raw)
+        transcript = processed.annotated
+        caption = self._caption(processed)
+        self.ch.sync_lookup_clock()
+        partial = self.ch.lookup_decoder.preview(words)
+        if partial:
+            transcript += f"  [INFO LOOKUP: {partial}]"
+            caption += f"  [INFO LOOKUP: {partial}]"
+        print(f"{self.ch.prefix}{transcript}", end="\r", flush=True)
+        self.ch.obs_writer.update_live(caption)
 
-        if is_final:
-            print(transcript)
-        else:
-            print(transcript, end="\r", flush=True)
+        now = time.time()
+        best = self.last_interim_best
+        if len(transcript) >= 8 and (best is None or processed.text != best.text):
+            self.last_interim_best = processed
+            self.last_interim_update_time = now
+
+        best = self.last_interim_best
+        if best and self.last_interim_update_time:
+            if (now - self.last_interim_update_time) >= FORCE_LOG_AFTER_SECONDS:
+                if (now - self.last_forced_log_time) >= FORCE_LOG_MIN_INTERVAL:
+                    self.ch.full_logger.add_entry(
+                        best.text, kind="partial", lookup_decoded=None, html=best.html, spans=best.spans
+                    )
+                    self.last_forced_log_time = now
+                    self.last_interim_best = None
+                    self.last_interim_update_time = 0.0
+
+class InterimCoalescer:
+    """Latest-wins, rate-limited interim processing."""
+
+    def __init__(self, handler, max_hz: float):
+        self.handler = handler
+        self.min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.pending: tuple | None = None
+        self.last_run = 0.0
+        self.received = 0
+        self.processed = 0
+        self.superseded = 0
+        self._ready = asyncio.Event()
+
+    def offer(self, transcript_raw: str, words: list[LookupWord]) -> None:
+        self.received += 1
+        if self.pending is not None:
+            self.superseded += 1
+        self.pending = (transcript_raw, words)
+        self._ready.set()
+
+    def discard(self) -> None:
+        if self.pending is not None:
+            self.superseded += 1
+            self.pending = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            delay = self.last_run + self.min_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            item, self.pending = self.pending, None
+            if item is None:
+                continue
+            self.last_run = loop.time()
+            self.processed += 1
+            self.handler(*item)
+
+    def stats(self) -> str:
+        return (
+            f"interims: {self.received} received, {self.processed} processed, "
+            f"{self.superseded} superseded (max {INTERIM_MAX_HZ:g}/s)"
+        )
 
-        alert = contains_alert(transcript_raw)
-        caption_text = f"🚨 {transcript}" if alert else transcript
+def handle_message(ch: "Channel", msg: str | bytes, arrived: float) -> None:
+    """Everything the receiver does with one websocket message."""
+    kind, result = decode_message(msg)
+    ch.message_counts[kind] = ch.message_counts.get(kind, 0) + 1
+    if result is None:
+        return
+
+    captured = None
+    audio_end = result.audio_end
+    if audio_end is not None:
+        captured = ch.uplink.on_result(audio_end, arrived)
+        if result.is_final:
+            ch.replay_buffer.ack(audio_end)
+
+    if ch.deduper.is_duplicate(result):
+        return
+
+    if result.is_final:
+        ch.interims.discard()
+        ch.handler.on_final(result.transcript, result.lookup_words())
+        done = time.monotonic()
+        ch.latency.record("postprocess", done - arrived)
+        if captured is not None:
+            ch.latency.record("capture_to_caption", done - captured)
+    else:
+        ch.interims.offer(result.transcript, result.lookup_words())
+
+async def receiver(ch: "Channel", ws):
+    interims = asyncio.create_task(ch.interims.run())
+    try:
+        async for msg in ws:
+            arrived = time.monotonic()
+            if ch.trace is not None:
+                ch.trace.on_message(msg)
+            handle_message(ch, msg, arrived)
+    finally:
+        interims.cancel()
 
-        if is_final:
-            obs_writer.write_final(caption_text)
-            obs_writer.update_live(caption_text)
+# =============================================================================
+# CHANNELS (one per scanner; all share one event loop)
+# =============================================================================
+class Channel:
+    """Everything one scanner needs, from capture device to outputs."""
+
+    def __init__(
+        self,
+        name: str,
+        out_dir: Path,
+        device=None,
+        keyterms=(),
+        trace_dir: Path | None = None,
+        prefix: str = "",
+        obs_source: str = OBS_BROWSER_SOURCE,
+    ):
+        self.name = name
+        self.obs_source = obs_source
+        self.device = device
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.trace_dir = trace_dir
+        self.prefix = prefix
+        self.keyterms = keyterms
+        self.dg_url = build_dg_url(keyterms)
+        self.encoder: UplinkEncoder | None = None  # see set_uplink_encoding
+
+        self.tuner = RadioTuner(SAMPLE_RATE)
+        self.capture_rate = SAMPLE_RATE
+        self.resampler: PolyphaseResampler | None = None
+        self.ring = AudioRingBuffer(int(RING_SECONDS * SAMPLE_RATE))
+        inplace = DSP_INPLACE and AUDIO_QUEUE_MAX_MS > 0
+        self.pcm_pool = PCM16Pool(pcm16_pool_frames()) if inplace else None
+        self.work = np.zeros(DSP_BATCH_FRAMES, dtype=np.float32)
+        self.dsp_worker: DSPWorker | None = None
+        self.audio_q = AsyncAudioBridge(AUDIO_QUEUE_MAX_MS, AUDIO_QUEUE_POLICY)
+        self.vad = VoiceGate(VAD_HANGOVER_MS, VAD_PREROLL_MS) if VAD_ENABLED else None
+        self.latency = LatencyTracer()
+        self.uplink = UplinkStats(self.latency)
+        self.replay_buffer = ReplayBuffer(REPLAY_SECONDS)
+        self.deduper = TranscriptDeduper()
+        self.conn_stats = ConnectionStats(self.deduper)
+        self.trace: TraceRecorder | None = None
+
+        self.lookup_decoder = InfoLookupDecoder()
+        self.gated_seen = 0  # vad.gated_bytes already added to the decoder clock
+        self.caption_store = TranscriptStore(
+            out_dir / OBS_CAPTION_LOG_DIR.name, log_appender,
+            LOG_SEGMENT_ROTATE, LOG_SEGMENT_MAX_BYTES, LOG_SEGMENT_COMPRESS,
+        )
+        self.obs_writer = OBSCaptionWriter(
+            out_dir / OBS_LIVE_FILE.name, out_dir / OBS_FINAL_FILE.name, self.caption_store
+        )
+        self.log_store = TranscriptStore(
+            out_dir / FULL_LOG_DIR.name, log_appender,
+            LOG_SEGMENT_ROTATE, LOG_SEGMENT_MAX_BYTES, LOG_SEGMENT_COMPRESS,
+        )
+        self.index = (
+            TranscriptIndex(out_dir / TRANSCRIPT_INDEX_FILE.name) if TRANSCRIPT_INDEX_ENABLED else None
+        )
+        self.full_logger = FullTranscriptLogger(
+            self.log_store, out_dir / FULL_LOG_HTML_FILE.name, SILENCE_GAP_SECONDS, self.index,
+            self_reload=obs_refresh is None,
+        )
+        self.handler = TranscriptHandler(self)
+        self.interims = InterimCoalescer(self.handler.on_interim, INTERIM_MAX_HZ)
+        self.message_counts: dict[str, int] = {}
+
+    def set_uplink_encoding(self, encoding: str) -> None:
+        """Stream `encoding` upstream (before run_connection)."""
+        encoding = effective_uplink_encoding(encoding)
+        if self.encoder is not None:
+            self.encoder.close()
+        self.dg_url = build_dg_url(self.keyterms, encoding)
+        self.encoder = UplinkEncoder(encoding, self.name) if encoding != "linear16" else None
+
+    def sync_lookup_clock(self) -> None:
+        """Advance the lookup decoder by audio the VAD gated since last time."""
+        if self.vad is None:
+            return
+        gated = self.vad.gated_bytes
+        if gated != self.gated_seen:
+            self.lookup_decoder.advance((gated - self.gated_seen) / self.vad.bytes_per_second)
+            self.gated_seen = gated
+
+    # ---- audio (PortAudio callback / DSP worker threads)
+    def set_capture_rate(self, rate: int) -> None:
+        """Capture at `rate`, resampling to SAMPLE_RATE (before start_audio)."""
+        self.capture_rate = int(rate)
+        self.resampler = None
+        if self.capture_rate != SAMPLE_RATE:
+            self.resampler = PolyphaseResampler(self.capture_rate, SAMPLE_RATE, resample_cutoff_hz())
+            print(f"{self.prefix}Capturing at {self.capture_rate} Hz, resampling to {SAMPLE_RATE} Hz")
+        self.tuner.fused_low_pass = self.resampler is not None
+        self.ring = AudioRingBuffer(int(RING_SECONDS * self.capture_rate), self.capture_rate)
+
+    def capture_frames(self, frames: int) -> int:
+        """`frames` at SAMPLE_RATE expressed at the capture rate."""
+        return frames * self.capture_rate // SAMPLE_RATE
+
+    def scratch(self, n: int) -> np.ndarray:
+        """The channel's float32 work buffer, at least n frames long."""
+        if len(self.work) < n:
+            self.work = np.zeros(n, dtype=np.float32)
+        return self.work[:n]
+
+    def push_audio(self, x: np.ndarray, captured: float, owned: bool = False) -> None:
+        """One block through resampler, tuner and VAD onto the uplink queue."""
+        if self.resampler is not None:
+            x = self.resampler.process(x)
+            owned = True
+            if not len(x):
+                return
+        voiced = self.vad is not None and float(np.dot(x, x)) >= VAD_RMS * VAD_RMS * len(x)
+        if self.pcm_pool is not None:
+            if not owned:
+                buf = self.scratch(len(x))
+                np.copyto(buf, x)
+                x = buf
+            pcm = block_to_pcm16_inplace(self.tuner, x, self.pcm_pool)
         else:
-            obs_writer.update_live(caption_text)
-
-        now = time.time()
-
-        if is_final:
-            full_logger.add_entry(transcript, kind="final", lookup_decoded=decoded_lookup)
-            last_interim_best = ""
-            last_interim_update_time = 0.0
-            continue
+            pcm = block_to_pcm16(self.tuner, x)
+        self.latency.record("dsp", time.monotonic() - captured)
+        speech = self.tuner.last_block_is_speech()
+        if self.vad is None:
+            self.audio_q.put(pcm, speech, captured)
+            return
+        for chunk, chunk_speech, chunk_captured in self.vad.process(pcm, voiced, speech, captured):
+            self.audio_q.put(chunk, chunk_speech, chunk_captured)
 
-        if len(transcript) >= 8 and transcript != last_interim_best:
-            last_interim_best = transcript
-            last_interim_update_time = now
+    def audio_callback(self, indata, frames, time_info, status):
+        captured = capture_end_time(time_info, frames, self.capture_rate)
+        if CAPTURE_MODE == "ring":
+            self.ring.write(indata[:, 0], captured)
+            return
+        self.push_audio(indata[:, 0], captured)
+
+    def input_stream(self):
+        return sd.InputStream(
+            device=self.device,
+            samplerate=self.capture_rate,
+            channels=CHANNELS,
+            dtype="float32",
+            callback=self.audio_callback,
+            blocksize=self.capture_frames(AUDIO_BLOCKSIZE),
+        )
 
-        if last_interim_best and last_interim_update_time:
-            if (now - last_interim_update_time) >= FORCE_LOG_AFTER_SECONDS:
-                if (now - last_forced_log_time) >= FORCE_LOG_MIN_INTERVAL:
-                    full_logger.add_entry(last_interim_best, kind="partial", lookup_decoded=None)
-                    last_forced_log_time = now
-                    last_interim_best = ""
-                    last_interim_update_time = 0.0
+    # ---- lifecycle
+    def open_outputs(self) -> None:
+        if self.index is not None:
+            self.index.start()
+        file_writer.submit(self.obs_writer.live_path, "")
+        file_writer.submit(self.obs_writer.final_path, "")
+        if RECORD_TRACE and self.trace_dir is not None:
+            self.trace = TraceRecorder(self.trace_dir, RECORD_TRACE_PCM)
+        if obs_refresh is not None:
+            self.full_logger.file_listeners.append(lambda path: obs_refresh.notify(self.obs_source))
+
+    def start_audio(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.audio_q.bind(loop)
+        if CAPTURE_MODE == "ring":
+            self.dsp_worker = DSPWorker(self, self.capture_frames(DSP_BATCH_FRAMES))
+            self.dsp_worker.start()
+
+    def stop_audio(self) -> None:
+        if self.dsp_worker is not None:
+            self.dsp_worker.stop()
+            if self.ring.overflow_frames:
+                print(f"{self.prefix}Capture ring dropped {self.ring.overflow_frames} frames")
+
+    def close_outputs(self) -> None:
+        self.log_store.close()
+        self.caption_store.close()
+        if self.index is not None:
+            self.index.close()
+        if self.trace is not None:
+            self.trace.close()
+        if self.encoder is not None:
+            self.encoder.close()
+
+    def stats_lines(self) -> list[str]:
+        lines = [
+            self.uplink.summary(),
+            self.audio_q.stats(),
+            self.conn_stats.summary(),
+            self.interims.stats(),
+            "messages: " + (", ".join(f"{n} {k}" for k, n in sorted(self.message_counts.items())) or "none"),
+        ]
+        if self.vad is not None:
+            lines.append(self.vad.stats())
+        if self.pcm_pool is not None:
+            lines.append(self.pcm_pool.stats())
+        if self.encoder is not None:
+            lines.append(self.encoder.stats())
+        if self.index is not None:
+            lines.append(self.index.stats())
+        lines.extend(self.latency.summary().splitlines())
+        return lines
+
+def build_channels(scanners: list[dict]) -> list[Channel]:
+    single = len(scanners) == 1
+    out = []
+    for cfg in scanners:
+        name = cfg["name"]
+        out_dir = cfg.get("out_dir")
+        out.append(Channel(
+            name,
+            Path(out_dir) if out_dir else (OBS_DIR if single else OBS_DIR / name),
+            device=cfg.get("device"),
+            keyterms=cfg.get("keyterms", ()),
+            trace_dir=TRACE_DIR if single else TRACE_DIR / name,
+            prefix="" if single else f"[{name}] ",
+            obs_source=cfg.get("obs_source", OBS_BROWSER_SOURCE),
+        ))
+    return out
+
+channels = build_channels(SCANNERS)
+
+def open_outputs():
+    file_writer.start()
+    if obs_refresh is not None:
+        obs_refresh.start()
+    for ch in channels:
+        ch.open_outputs()
+
+def close_outputs():
+    """Flush and close every writer (captions, logs, index, trace)."""
+    file_writer.stop()
+    if obs_refresh is not None:
+        obs_refresh.stop()
+    for ch in channels:
+        ch.close_outputs()
+    log_appender.close()
 
 async def main():
+    if sd is None:
+        raise SystemExit("sounddevice/PortAudio is not available (use replay.py for offline runs)")
     headers = {"Authorization": f"Token {DEEPGRAM_KEY}"}
+    open_outputs()
 
-    atomic_write(OBS_LIVE_FILE, "")
-    atomic_write(OBS_FINAL_FILE, "")
-
-    if not FULL_LOG_FILE.exists():
-        FULL_LOG_FILE.write_text("", encoding="utf-8")
-
-    if not FULL_LOG_HTML_FILE.exists():
-        atomic_write(FULL_LOG_HTML_FILE, "<!doctype html><html><body></body></html>")
+    loop = asyncio.get_running_loop()
+    install_shutdown_handlers(loop, asyncio.current_task())
+    encoding = effective_uplink_encoding(UPLINK_ENCODING)
+    if encoding != UPLINK_ENCODING:
+        print(f"PyAV not installed; UPLINK_ENCODING={UPLINK_ENCODING!r} falls back to linear16")
+    for ch in channels:
+        ch.set_uplink_encoding(encoding)
+        ch.set_capture_rate(capture_rate_for(ch.device))
+        ch.start_audio(loop)
 
-    blocksize = 320
+    if OVERLAY_SERVER_ENABLED:
+        await OverlayServer(channels, OVERLAY_HOST, OVERLAY_PORT).start()
 
-    with sd.InputStream(
-        samplerate=SAMPLE_RATE,
-        channels=CHANNELS,
-        dtype="float32",
-        callback=audio_callback,
-        blocksize=blocksize,
-    ):
-        async with websockets.connect(DG_URL, additional_headers=headers) as ws:
-            await asyncio.gather(sender(ws), receiver(ws))
+    try:
+        with contextlib.ExitStack() as streams:
+            for ch in channels:
+                streams.enter_context(ch.input_stream())
+            tasks = [run_connection(ch, headers) for ch in channels]
+            if UPLINK_STATS_SECONDS > 0:
+                tasks.append(report_uplink_stats())
+            await asyncio.gather(*tasks)
+    finally:
+        close_outputs()
+        print_stats()
+        for ch in channels:
+            ch.stop_audio()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except asyncio.CancelledError:
+        pass  # SIGTERM/SIGHUP: outputs were closed in main()
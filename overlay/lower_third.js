@@ -0,0 +1,53 @@
+(function(){
+  function pinBottom(){
+    try {
+      window.scrollTo(0, document.body.scrollHeight);
+    } catch(e){}
+  }
+  pinBottom();
+  setInterval(pinBottom, 250);
+
+  // file:// source: the HTML is rewritten on disk. Reload it ourselves
+  // unless the OBS refresh controller reloads the source on each rewrite.
+  if (location.protocol !== "http:" && location.protocol !== "https:") {
+    if (document.body.getAttribute("data-reload") !== "obs") {
+      setInterval(function(){
+        location.reload();
+      }, 1500);
+    }
+    return;
+  }
+
+  // Served by the overlay server: apply pushed block deltas in place.
+  var stack = document.getElementById("stack");
+  var maxBlocks = 6;
+
+  function upsert(block){
+    var tmp = document.createElement("div");
+    tmp.innerHTML = block.html;
+    var fresh = tmp.firstElementChild;
+    if (!fresh) return;
+    var old = document.getElementById("b" + block.id);
+    if (old) {
+      stack.replaceChild(fresh, old);
+    } else {
+      stack.appendChild(fresh);
+    }
+    while (stack.children.length > maxBlocks) {
+      stack.removeChild(stack.firstElementChild);
+    }
+  }
+
+  var events = new EventSource("events");
+  events.onmessage = function(ev){
+    var msg = JSON.parse(ev.data);
+    if (msg.op === "reset") {
+      maxBlocks = msg.max;
+      stack.innerHTML = "";
+      msg.blocks.forEach(upsert);
+    } else if (msg.op === "block") {
+      upsert(msg);
+    }
+    pinBottom();
+  };
+})();
@@ -0,0 +1,192 @@
+"""Offline replay of a recorded scanner session.
+
+Runs the real main143 pipeline without a sound card or a Deepgram account:
+
+    audio.wav -> audio_q -> sender -> local fake ASR server
+    messages.jsonl (original timing) -> receiver -> captions / logs / index
+
+A trace's audio.wav is what was sent, already through the tuner and VAD, so
+it goes straight onto the uplink queue. Audio given with --wav is treated as
+raw capture and runs through the tuner (and VAD) first.
+
+Record a trace by setting RECORD_TRACE = True in main143.py; each run
+writes traces/<start time>/messages.jsonl (+ audio.wav). Then:
+
+    python replay.py traces/20251229-231329 --out replay_out
+    python replay.py traces/20251229-231329 --speed 8       # 8x real time
+    python replay.py traces/20251229-231329 --speed 0       # as fast as possible
+
+All output goes to --out (via PSCANNER_OBS_DIR), never to obs_text.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+import websockets
+
+
+def load_messages(path: Path) -> list[tuple[float, str]]:
+    """(seconds since the first connect, raw message) for every received message."""
+    out = []
+    t_connect = None
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec.get("event") == "connect":
+                if t_connect is None:
+                    t_connect = rec["t"]
+                continue
+            if "msg" in rec:
+                out.append((rec["t"], rec["msg"]))
+    t0 = t_connect if t_connect is not None else 0.0
+    return [(max(0.0, t - t0), msg) for t, msg in out]
+
+
+def load_wav(path: Path) -> tuple[np.ndarray, int]:
+    """(mono int16 samples, sample rate)."""
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit PCM WAV is supported")
+        channels = w.getnchannels()
+        rate = w.getframerate()
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm[::channels]
+    return pcm, rate
+
+
+class FakeASRServer:
+    """Accepts one stream, swallows its audio and plays back the recorded messages."""
+
+    TAIL_SECONDS = 0.5  # keep the socket open briefly after the last message
+
+    def __init__(self, messages: list[tuple[float, str]], speed: float):
+        self.messages = messages
+        self.speed = speed
+        self.audio_bytes = 0
+        self.audio_frames = 0
+        self.sent = 0
+
+    async def handler(self, ws):
+        async def consume():
+            async for frame in ws:
+                if isinstance(frame, bytes):
+                    self.audio_bytes += len(frame)
+                    self.audio_frames += 1
+
+        consumer = asyncio.create_task(consume())
+        t0 = time.monotonic()
+        try:
+            for t, msg in self.messages:
+                if self.speed > 0:
+                    delay = t0 + t / self.speed - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send(msg)
+                self.sent += 1
+            await asyncio.sleep(self.TAIL_SECONDS)
+        finally:
+            consumer.cancel()
+
+
+async def feed_audio(m, ch, pcm: np.ndarray, raw: bool, speed: float, progress: dict) -> None:
+    """Feed int16 `pcm` to the channel's audio_q in capture-sized blocks;
+    `raw` audio goes through the tuner first, sent audio goes as is."""
+    block = m.AUDIO_BLOCKSIZE
+    t0 = time.monotonic()
+    x = pcm.astype(np.float32) / 32768.0 if raw else pcm
+    for i in range(0, len(x), block):
+        captured = time.monotonic()
+        if raw:
+            ch.push_audio(x[i:i + block], captured)
+        else:
+            ch.audio_q.put(x[i:i + block].tobytes(), True, captured)
+        progress["dsp"] += time.monotonic() - captured
+        progress["frames"] += len(x[i:i + block])
+        if speed > 0:
+            delay = t0 + (i + block) / m.SAMPLE_RATE / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+
+
+async def replay(m, messages, audio: np.ndarray, raw: bool, speed: float) -> None:
+    """Replay into the first configured channel."""
+    ch = m.channels[0]
+    server = FakeASRServer(messages, speed)
+    loop = asyncio.get_running_loop()
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as srv:
+        port = srv.sockets[0].getsockname()[1]
+        ch.set_uplink_encoding(m.UPLINK_ENCODING)
+        m.open_outputs()
+        ch.audio_q.bind(loop)
+        progress = {"dsp": 0.0, "frames": 0}
+        feeder = asyncio.create_task(feed_audio(m, ch, audio, raw, speed, progress))
+        t0 = time.perf_counter()
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+                ch.conn_stats.connects += 1
+                ch.uplink.reset_stream()
+                await m.run_session(ch, ws)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            wall = time.perf_counter() - t0
+            feeder.cancel()
+            m.close_outputs()
+
+    audio_s = progress["frames"] / m.SAMPLE_RATE
+    dsp = progress["dsp"]
+    print(f"Replayed {server.sent}/{len(messages)} messages in {wall:.2f}s wall")
+    fed = (
+        f"DSP {dsp * 1000:.0f} ms ({audio_s / max(dsp, 1e-9):.0f}x real time)" if raw
+        else "sent as recorded (no DSP)"
+    )
+    print(
+        f"audio: {audio_s:.1f}s fed, {server.audio_bytes} bytes in {server.audio_frames} frames "
+        f"reached the server, {fed}"
+    )
+    if wall > 0:
+        print(f"throughput: {server.sent / wall:.1f} msg/s, {audio_s / wall:.2f}x real time overall")
+    m.print_stats()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a recorded trace through the main143 pipeline")
+    ap.add_argument("trace", type=Path, help="trace directory (messages.jsonl, audio.wav)")
+    ap.add_argument("--wav", type=Path, help="raw capture to run through the tuner instead of the trace's audio.wav")
+    ap.add_argument("--out", type=Path, default=Path("replay_out"), help="output directory")
+    ap.add_argument("--speed", type=float, default=1.0, help="time scale; 0 = no pacing")
+    args = ap.parse_args()
+
+    messages = load_messages(args.trace / "messages.jsonl")
+    wav_path = args.wav or args.trace / "audio.wav"
+
+    # Must be set before main143 is imported: its writers are built at import.
+    args.out.mkdir(parents=True, exist_ok=True)
+    os.environ["PSCANNER_OBS_DIR"] = str(args.out.resolve())
+    import main143 as m
+
+    raw = args.wav is not None
+    if wav_path.exists():
+        audio, rate = load_wav(wav_path)
+        if rate != m.SAMPLE_RATE:
+            raise SystemExit(f"{wav_path}: {rate} Hz, expected {m.SAMPLE_RATE} Hz")
+    else:
+        # no recorded PCM: stream silence for as long as the trace lasts
+        seconds = (messages[-1][0] if messages else 0.0) + 1.0
+        audio = np.zeros(int(seconds * m.SAMPLE_RATE), dtype=np.int16)
+
+    asyncio.run(replay(m, messages, audio, raw, args.speed))
+
+
+if __name__ == "__main__":
+    main()
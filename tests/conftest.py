@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# main143 builds its writers at import; keep their output out of obs_text.
+os.environ.setdefault("PSCANNER_OBS_DIR", tempfile.mkdtemp(prefix="pscanner-tests-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,103 @@
+import main143 as m
+
+
+def final(decoder, text, start):
+    return decoder.process_words(m.lookup_words(None, text, start))
+
+
+def test_spelled_name_decodes():
+    d = m.InfoLookupDecoder()
+    assert final(d, "10-28 on John Ocean Henry Nora space Sam Mary Ida Tom Henry", 1.0) == "JOHN SMITH"
+
+
+def test_letter_outside_window_does_not_leak_into_next_lookup():
+    d = m.InfoLookupDecoder()
+    assert final(d, "copy 10-71 Adam", 0.0) is None
+    assert final(d, "Adam 12 copy 10-71", 0.0) is None
+    assert final(d, "10-28 on Adam Boy Charles space David Edward Frank", 2.0) == "ABC DEF"
+
+
+def test_window_expires_across_gated_silence():
+    d = m.InfoLookupDecoder()
+    final(d, "10-28 on", 1.0)
+    d.advance(120.0)  # two minutes the VAD never sent
+    assert final(d, "Adam Boy Charles space David Edward Frank", 2.0) is None
+    assert not d.active_until
+
+
+def test_channel_feeds_gated_time_to_decoder():
+    ch = m.channels[0]
+    if ch.vad is None:
+        return
+    before = ch.lookup_decoder.offset
+    ch.vad.gated_bytes += int(30 * ch.vad.bytes_per_second)
+    ch.sync_lookup_clock()
+    assert ch.lookup_decoder.offset == before + 30.0
+    ch.sync_lookup_clock()
+    assert ch.lookup_decoder.offset == before + 30.0
+
+
+def timed(text, start, step=0.4):
+    return [m.LookupWord(m.normalize_phonetic_token(w), start + i * step) for i, w in enumerate(text.split())]
+
+
+def test_name_spread_over_finals():
+    d = m.InfoLookupDecoder()
+    assert final(d, "ten twenty eight on", 1.0) is None
+    assert final(d, "John Ocean Henry Nora", 3.0) is None  # end of a final closes the word
+    assert final(d, "Sam Mary Ida Tom Henry", 5.0) == "JOHN SMITH"
+
+
+def test_callsign_letter_is_not_spelled():
+    d = m.InfoLookupDecoder()
+    assert final(d, "10-28 Adam 12 on Boy Ocean Boy last name Lincoln Edward Edward", 1.0) == "BOB LEE"
+
+
+def test_stop_word_ends_lookup():
+    d = m.InfoLookupDecoder()
+    assert final(d, "10-28 on Adam Boy Charles space David Edward Frank returns no record", 1.0) == "ABC DEF"
+    d = m.InfoLookupDecoder()
+    assert final(d, "10-28 on Adam Boy Charles negative", 1.0) is None
+    assert not d.active_until
+    assert final(d, "David Edward Frank space George Henry Ida", 2.0) is None
+
+
+def test_short_words_are_skipped():
+    d = m.InfoLookupDecoder(min_letters_per_word=3)
+    assert final(d, "10-28 Adam Boy space Charles David Edward space Frank George Henry", 1.0) == "CDE FGH"
+
+
+def test_window_expires_in_audio_time():
+    d = m.InfoLookupDecoder(window_seconds=5.0)
+    assert d.process_words(timed("10-28 on", 1.0)) is None
+    assert d.process_words(timed("Adam Boy Charles space David Edward Frank", 10.0)) is None
+    assert not d.words and not d.current_letters
+
+
+def test_new_stream_continues_the_clock():
+    d = m.InfoLookupDecoder(window_seconds=14.0)
+    d.process_words(timed("10-28 on", 1.0))
+    d.new_stream(downtime=2.0)  # timestamps restart at 0
+    assert d.process_words(timed("Adam Boy Charles space David Edward Frank", 0.5)) == "ABC DEF"
+
+    d = m.InfoLookupDecoder(window_seconds=14.0)
+    d.process_words(timed("10-28 on", 1.0))
+    d.new_stream(downtime=30.0)
+    assert d.process_words(timed("Adam Boy Charles space David Edward Frank", 0.5)) is None
+
+
+def test_preview_leaves_state_untouched():
+    d = m.InfoLookupDecoder()
+    final(d, "10-28 on", 1.0)
+    state = d._state()
+    assert d.preview(timed("John Ocean", 2.0)) == "JO..."
+    assert d._state() == state
+    assert d.preview(timed("copy that", 2.0)) is None
+
+
+def test_word_timings_from_deepgram():
+    raw = [{"word": "ten", "start": 1.0}, {"word": "twenty", "start": 1.2}, {"word": "eight", "start": 1.4},
+           {"word": "x-ray", "start": 2.0}]
+    words = m.lookup_words(raw, "ignored", 0.0)
+    assert [w.start for w in words] == [1.0, 1.2, 1.4, 2.0]
+    assert m.lookup_words(None, "Adam Boy", 3.0) == [m.LookupWord("adam", 3.0), m.LookupWord("boy", 3.0)]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import main143 as m
+
+
+def tone(freq, rate, seconds=1.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def run(resampler, x, sizes):
+    out, i, k = [], 0, 0
+    while i < len(x):
+        n = sizes[k % len(sizes)]
+        out.append(resampler.process(x[i:i + n]))
+        i += n
+        k += 1
+    return np.concatenate(out)
+
+
+@pytest.mark.parametrize("rate", [44100, 48000, 22050])
+def test_block_split_does_not_change_output(rate):
+    x = np.random.default_rng(1).standard_normal(rate).astype(np.float32) * 0.1
+    whole = m.PolyphaseResampler(rate, 16000, 3600.0).process(x)
+    split = run(m.PolyphaseResampler(rate, 16000, 3600.0), x, [1, 7, 441, 960, 3, 2048])
+    assert len(split) == len(whole)
+    np.testing.assert_allclose(split, whole, atol=1e-6)
+
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_output_length_tracks_rate_ratio(rate):
+    r = m.PolyphaseResampler(rate, 16000, 3600.0)
+    total = sum(len(r.process(np.zeros(480, np.float32))) for _ in range(rate // 480 * 3))
+    assert abs(total - 3 * 16000 * (rate // 480 * 480) / rate) <= 1
+
+
+def test_passband_kept_and_stopband_rejected():
+    rate = 48000
+    r = m.PolyphaseResampler(rate, 16000, 3600.0)
+    low = r.process(tone(1000.0, rate))[2000:]
+    assert 0.3 < np.sqrt(np.mean(low ** 2)) < 0.4  # 0.5 peak sine ~ 0.354 rms
+
+    r = m.PolyphaseResampler(rate, 16000, 3600.0)
+    high = r.process(tone(7500.0, rate))[2000:]  # would alias to 8.5 kHz
+    assert 20 * np.log10(np.sqrt(np.mean(high ** 2)) / 0.354) < -60
+
+
+def test_same_rate_is_a_low_pass():
+    r = m.PolyphaseResampler(16000, 16000, 3600.0)
+    x = tone(500.0, 16000)
+    y = r.process(x)
+    assert len(y) == len(x)
+    assert np.sqrt(np.mean(y[2000:] ** 2)) == pytest.approx(0.354, rel=0.05)
@@ -0,0 +1,69 @@
+import pytest
+
+import main143 as m
+
+
+@pytest.fixture
+def tables():
+    saved = (dict(m.CODE_MEANINGS), dict(m.PC_MEANINGS), list(m.ALERT_KEYWORDS), list(m.LOCATIONS))
+    yield
+    codes, pcs, alerts, locations = saved
+    m.CODE_MEANINGS.clear()
+    m.CODE_MEANINGS.update(codes)
+    m.PC_MEANINGS.clear()
+    m.PC_MEANINGS.update(pcs)
+    m.ALERT_KEYWORDS[:] = alerts
+    m.LOCATIONS[:] = locations
+
+
+def test_code_meaning_edit_invalidates_cache(tables):
+    before = m.process_transcript("Adam 12 10-4")
+    assert "(Message received and understood)" in before.annotated
+    m.CODE_MEANINGS["10-4"] = "Copy that"
+    after = m.process_transcript("Adam 12 10-4")
+    assert after is not before
+    assert "(Copy that)" in after.annotated
+
+
+@pytest.mark.parametrize("edit", [
+    lambda d: d.pop("10-4"),
+    lambda d: d.__delitem__("10-4"),
+    lambda d: d.update({"10-4": None}),
+    lambda d: d.clear(),
+])
+def test_removing_code_meaning_drops_annotation(tables, edit):
+    assert "(Message received" in m.process_transcript("copy 10-4").annotated
+    edit(m.CODE_MEANINGS)
+    assert "(Message received" not in m.process_transcript("copy 10-4").annotated
+
+
+def test_location_and_alert_edits_rebuild_matcher(tables):
+    assert "hl loc" not in m.highlight_to_html("units to zzyzx road")
+    m.LOCATIONS.append("Zzyzx Road")
+    assert "hl loc" in m.highlight_to_html("units to zzyzx road")
+
+    assert not m.process_transcript("shots fired").alert
+    m.ALERT_KEYWORDS += ["shots fired"]
+    assert m.process_transcript("shots fired").alert
+
+
+def test_pc_meaning_edit(tables):
+    m.PC_MEANINGS.setdefault("999", "Test section")
+    assert "(Test section)" in m.process_transcript("PC 999").annotated
+
+
+def test_alerts_use_the_words_heard():
+    assert m.process_transcript("unit 10-80 pursuit").alert
+    assert not m.process_transcript("unit 10 80 pursuit").alert
+    assert not m.process_transcript("units respond to 1045 Main Street").alert
+
+
+def test_spoken_code_after_callsign():
+    assert m.process_transcript("Adam ten four").annotated == "Adam 10-4 (Message received and understood)"
+
+
+def test_joined_callsign_spacing_only_in_html():
+    processed = m.process_transcript("Charles3104 en route")
+    assert processed.text == "Charles3104 en route"
+    assert processed.annotated == "Charles3104 en route"
+    assert "Charles 3" in processed.html
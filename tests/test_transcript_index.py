@@ -0,0 +1,55 @@
+import pytest
+
+from transcript_index import TranscriptIndex, normalize_key
+
+
+@pytest.fixture
+def index(tmp_path):
+    ix = TranscriptIndex(tmp_path / "index.sqlite3")
+    ix.start()
+    ix.add(100.0, "final", "Adam 12 10-71 at Main", entities=[("callsign", "Adam 12"), ("code", "10 71")])
+    ix.add(200.0, "final", "white Toyota northbound", entities=[("callsign", "Boy 4")])
+    ix.add(300.0, "final", "10-28 on", lookup="JOHN SMITH", entities=[("code", "10-28")])
+    ix.add(400.0, "partial", "suspect 245 PC", entities=[("pc", "245 pc"), ("callsign", "adam  12")])
+    ix.close()  # drains the writer
+    yield ix
+    ix.close()
+
+
+def texts(hits):
+    return [h.text for h in hits]
+
+
+def test_entity_queries_normalize_keys(index):
+    assert texts(index.search(callsign="ADAM 12")) == ["suspect 245 PC", "Adam 12 10-71 at Main"]
+    assert texts(index.search(code="10-71")) == ["Adam 12 10-71 at Main"]
+    assert texts(index.search(pc="245")) == ["suspect 245 PC"]
+    assert texts(index.search(lookup="john smith")) == ["10-28 on"]
+
+
+def test_full_text_and_time_filters(index):
+    assert texts(index.search(text="white toyota")) == ["white Toyota northbound"]
+    assert texts(index.search(text="JOHN")) == ["10-28 on"]  # lookup column is searched too
+    assert texts(index.search(text="10-71")) == ["Adam 12 10-71 at Main"]
+    assert texts(index.search(callsign="Adam 12", since=150.0)) == ["suspect 245 PC"]
+    assert texts(index.search(since=150.0, until=350.0)) == ["10-28 on", "white Toyota northbound"]
+    assert index.search(callsign="Adam 12", until=50.0) == []
+
+
+def test_hits_keep_kind_and_lookup(index):
+    (hit,) = index.search(pc="245 PC")
+    assert hit.kind == "partial" and "[partial]" in str(hit)
+    (hit,) = index.search(code="10-28")
+    assert hit.lookup == "JOHN SMITH" and "INFO LOOKUP: JOHN SMITH" in str(hit)
+
+
+def test_add_without_writer_is_dropped(tmp_path):
+    ix = TranscriptIndex(tmp_path / "index.sqlite3")
+    ix.add(1.0, "final", "ten four")
+    assert ix.dropped == 1 and ix.q.qsize() == 0
+
+
+def test_normalize_key():
+    assert normalize_key("pc", "245 p.c.") == "245"
+    assert normalize_key("code", "10 71") == "10-71"
+    assert normalize_key("callsign", " adam   12 ") == "ADAM 12"
@@ -0,0 +1,94 @@
+import gzip
+import time
+
+from transcript_store import TS_FORMAT, TranscriptStore
+
+
+def at(stamp):
+    return time.mktime(time.strptime(stamp, TS_FORMAT))
+
+
+def entry(store, stamp, text, extra=()):
+    when = at(stamp)
+    store.write(f"[{stamp}] {text}\n", when)
+    for line in extra:
+        store.write(f"    {line}\n", when, entry_start=False)
+
+
+def fill(store):
+    entry(store, "2025-12-29 23:58:00", "Adam 12 10-8")
+    entry(store, "2025-12-29 23:59:30", "10-28 on", ["INFO LOOKUP: JOHN SMITH"])
+    entry(store, "2025-12-30 00:00:10", "Boy 4 copy")
+    entry(store, "2025-12-30 00:30:00", "Charles 7 10-97")
+    store.close()
+
+
+def test_rotates_on_the_hour(tmp_path):
+    store = TranscriptStore(tmp_path)
+    fill(store)
+    assert [s.name for s in store.segments()] == ["20251229-235800", "20251230-000010"]
+
+
+def test_rotates_past_max_bytes_on_entry_boundary(tmp_path):
+    store = TranscriptStore(tmp_path, rotate="size", max_bytes=40)
+    entry(store, "2025-12-30 00:10:00", "Adam 12 10-8")
+    entry(store, "2025-12-30 00:11:00", "10-28 on", ["INFO LOOKUP: JOHN SMITH"])
+    entry(store, "2025-12-30 00:12:00", "Boy 4 copy")
+    store.close()
+    segs = store.segments()
+    assert [s.name for s in segs] == ["20251230-001000", "20251230-001200"]
+    # the INFO LOOKUP continuation stays with its entry, past the limit
+    assert segs[0].txt.read_text().endswith("INFO LOOKUP: JOHN SMITH\n")
+    assert segs[1].txt.read_text() == "[2025-12-30 00:12:00] Boy 4 copy\n"
+
+
+def test_read_range_uses_the_index(tmp_path):
+    store = TranscriptStore(tmp_path)
+    fill(store)
+    lines = list(store.read_range(at("2025-12-29 23:59:00"), at("2025-12-30 00:10:00")))
+    assert lines == [
+        "[2025-12-29 23:59:30] 10-28 on\n",
+        "    INFO LOOKUP: JOHN SMITH\n",
+        "[2025-12-30 00:00:10] Boy 4 copy\n",
+    ]
+    assert list(store.read_range(at("2025-12-30 01:00:00"), at("2025-12-30 02:00:00"))) == []
+    assert len(list(store.read_range(0, time.time()))) == 5
+
+
+def test_compressed_segments_read_the_same(tmp_path):
+    plain = TranscriptStore(tmp_path / "plain")
+    fill(plain)
+    packed = TranscriptStore(tmp_path / "packed", compress=True)
+    fill(packed)
+    packed.close(compress_current=True)
+    segs = packed.segments()
+    assert all(s.txt.suffix == ".gz" for s in segs)
+    assert gzip.decompress(segs[0].txt.read_bytes()) == plain.segments()[0].txt.read_bytes()
+    span = (at("2025-12-29 23:59:00"), at("2025-12-30 00:31:00"))
+    assert list(packed.read_range(*span)) == list(plain.read_range(*span))
+
+
+def test_torn_index_record_is_ignored(tmp_path):
+    store = TranscriptStore(tmp_path)
+    fill(store)
+    seg = store.segments()[-1]
+    with seg.idx.open("ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert list(store.read_range(at("2025-12-30 00:30:00"), at("2025-12-30 00:30:00"))) == [
+        "[2025-12-30 00:30:00] Charles 7 10-97\n"
+    ]
+
+
+def test_import_flat_log(tmp_path):
+    flat = tmp_path / "full_transcript_log.txt"
+    flat.write_text(
+        "preamble without a timestamp\n"
+        "[2025-12-29 23:58:00] Adam 12 10-8\n"
+        "[2025-12-30 00:00:10] 10-28 on\n"
+        "    INFO LOOKUP: JOHN SMITH\n",
+        encoding="utf-8",
+    )
+    store = TranscriptStore(tmp_path / "store")
+    assert store.import_flat_log(flat) == 2
+    assert len(store.segments()) == 2
+    assert list(store.read_range(0, time.time())) == flat.read_text().splitlines(keepends=True)[1:]
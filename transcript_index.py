@@ -0,0 +1,286 @@
+"""Search index over transcript history (SQLite FTS5 + entity tables).
+
+FullTranscriptLogger hands every logged line to TranscriptIndex.add() along
+with the entities the span matcher already found (codes, PC sections,
+callsigns) and any decoded INFO LOOKUP name. A background thread batches the
+inserts, so the caption path never waits on SQLite.
+
+    entries(id, ts, kind, text, lookup)        one row per logged line
+    entries_fts(text, lookup)                  FTS5 over entries
+    entities(entry_id, kind, key, ts)          code / pc / callsign / lookup
+
+Query from Python:
+
+    TranscriptIndex(path).search(callsign="Adam 12", since=..., until=...)
+
+or from the command line:
+
+    python transcript_index.py obs_text/transcript_index.sqlite3 --code 10-71
+    python transcript_index.py obs_text/transcript_index.sqlite3 \\
+        --callsign "Adam 12" --since "2025-12-29 02:10" --until "2025-12-29 02:25"
+    python transcript_index.py obs_text/transcript_index.sqlite3 --text "white toyota"
+"""
+import argparse
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+ENTITY_KINDS = ("code", "pc", "callsign", "lookup")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries(
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    lookup TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE TABLE IF NOT EXISTS entities(
+    entry_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_key ON entities(kind, key, ts);
+"""
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts "
+    "USING fts5(text, lookup, content='entries', content_rowid='id')"
+)
+
+
+class Hit(NamedTuple):
+    ts: float
+    kind: str
+    text: str
+    lookup: str | None
+
+    def __str__(self) -> str:
+        stamp = time.strftime(TS_FORMAT, time.localtime(self.ts))
+        partial = " [partial]" if self.kind == "partial" else ""
+        line = f"[{stamp}] {self.text}{partial}"
+        if self.lookup:
+            line += f"\n    INFO LOOKUP: {self.lookup}"
+        return line
+
+
+def normalize_key(kind: str, key: str) -> str:
+    """Canonical entity key, so "245 pc", "245 PC" and "245" all match."""
+    key = re.sub(r"\s+", " ", key.strip().upper())
+    if kind == "pc":
+        key = re.sub(r"\s*P\.?\s*C\.?$", "", key)
+    elif kind == "code":
+        key = re.sub(r"^(\d+)[\s-]+(\d+)$", r"\1-\2", key)
+    return key
+
+
+def _phrase(text: str) -> str:
+    """Quote plain text as an FTS5 phrase (so "10-71" is not parsed as syntax)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _connect(path: Path) -> tuple[sqlite3.Connection, bool]:
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    try:
+        conn.execute(FTS_SCHEMA)
+        fts = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: text search falls back to LIKE
+        fts = False
+    conn.commit()
+    return conn, fts
+
+
+class TranscriptIndex:
+    BATCH_MAX = 256
+    QUEUE_MAX = 4096  # lines waiting for the writer before add() drops them
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.q: queue.Queue = queue.Queue(maxsize=self.QUEUE_MAX)
+        self.thread: threading.Thread | None = None
+        self._reader: sqlite3.Connection | None = None
+        self._fts = True
+        self.indexed = 0
+        self.batches = 0
+        self.dropped = 0
+
+    # ------------------------------------------------------------------ write
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="transcript-index", daemon=True)
+        self.thread.start()
+
+    def add(
+        self,
+        ts: float,
+        kind: str,
+        text: str,
+        lookup: str | None = None,
+        entities: list[tuple[str, str]] = (),
+    ) -> None:
+        """Queue one logged line; `entities` are (kind, key) pairs.
+
+        Never blocks: the line is dropped (and counted) if the writer thread
+        is not running or has fallen QUEUE_MAX lines behind.
+        """
+        if self.thread is None:
+            self.dropped += 1
+            return
+        try:
+            self.q.put_nowait((ts, kind, text, lookup, tuple(entities)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        conn, fts = _connect(self.path)
+        try:
+            while True:
+                item = self.q.get()
+                batch = []
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.BATCH_MAX:
+                        break
+                    try:
+                        item = self.q.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._insert(conn, fts, batch)
+                if item is None:
+                    return
+        finally:
+            conn.close()
+
+    def _insert(self, conn: sqlite3.Connection, fts: bool, batch: list) -> None:
+        with conn:
+            for ts, kind, text, lookup, entities in batch:
+                cur = conn.execute(
+                    "INSERT INTO entries(ts, kind, text, lookup) VALUES (?, ?, ?, ?)",
+                    (ts, kind, text, lookup),
+                )
+                entry_id = cur.lastrowid
+                if fts:
+                    conn.execute(
+                        "INSERT INTO entries_fts(rowid, text, lookup) VALUES (?, ?, ?)",
+                        (entry_id, text, lookup or ""),
+                    )
+                rows = {(k, normalize_key(k, key)) for k, key in entities if k in ENTITY_KINDS}
+                if lookup:
+                    rows.add(("lookup", normalize_key("lookup", lookup)))
+                conn.executemany(
+                    "INSERT INTO entities(entry_id, kind, key, ts) VALUES (?, ?, ?, ?)",
+                    [(entry_id, k, key, ts) for k, key in rows],
+                )
+        self.indexed += len(batch)
+        self.batches += 1
+
+    def close(self) -> None:
+        if self.thread is not None:
+            self.q.put(None)
+            self.thread.join()
+            self.thread = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def stats(self) -> str:
+        return (
+            f"transcript index: {self.indexed} lines in {self.batches} batches, "
+            f"{self.q.qsize()} queued, {self.dropped} dropped"
+        )
+
+    # ------------------------------------------------------------------- read
+    def search(
+        self,
+        text: str | None = None,
+        match: str | None = None,
+        code: str | None = None,
+        pc: str | None = None,
+        callsign: str | None = None,
+        lookup: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 100,
+    ) -> list[Hit]:
+        """Newest-first lines matching every given filter.
+
+        `text` is a plain phrase; `match` is raw FTS5 query syntax.
+        """
+        if self._reader is None:
+            self._reader, self._fts = _connect(self.path)
+        where, args = [], []
+        for kind, key in (("code", code), ("pc", pc), ("callsign", callsign), ("lookup", lookup)):
+            if key:
+                where.append("e.id IN (SELECT entry_id FROM entities WHERE kind = ? AND key = ?)")
+                args += [kind, normalize_key(kind, key)]
+        if text or match:
+            if self._fts:
+                where.append("e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)")
+                args.append(match or _phrase(text))
+            else:
+                where.append("(e.text LIKE ? OR e.lookup LIKE ?)")
+                args += [f"%{text or match}%"] * 2
+        if since is not None:
+            where.append("e.ts >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("e.ts <= ?")
+            args.append(until)
+        sql = "SELECT e.ts, e.kind, e.text, e.lookup FROM entries e"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.ts DESC LIMIT ?"
+        args.append(limit)
+        return [Hit(*row) for row in self._reader.execute(sql, args)]
+
+
+def _parse_time(value: str) -> float:
+    for fmt in (TS_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, fmt))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"bad time {value!r} (want YYYY-MM-DD[ HH:MM[:SS]])")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Search the transcript index")
+    ap.add_argument("index", type=Path)
+    ap.add_argument("--text", help="phrase to find in lines and lookups")
+    ap.add_argument("--match", help="raw FTS5 query")
+    ap.add_argument("--code", help='e.g. "10-71"')
+    ap.add_argument("--pc", help='e.g. "245 PC"')
+    ap.add_argument("--callsign", help='e.g. "Adam 12"')
+    ap.add_argument("--lookup", help="decoded INFO LOOKUP name")
+    ap.add_argument("--since", type=_parse_time)
+    ap.add_argument("--until", type=_parse_time)
+    ap.add_argument("--limit", type=int, default=100)
+    args = ap.parse_args()
+
+    index = TranscriptIndex(args.index)
+    t0 = time.perf_counter()
+    hits = index.search(
+        text=args.text, match=args.match, code=args.code, pc=args.pc,
+        callsign=args.callsign, lookup=args.lookup,
+        since=args.since, until=args.until, limit=args.limit,
+    )
+    elapsed = (time.perf_counter() - t0) * 1000
+    for hit in reversed(hits):
+        print(hit)
+    print(f"-- {len(hits)} hits in {elapsed:.1f} ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
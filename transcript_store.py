@@ -0,0 +1,299 @@
+"""Segmented, time-indexed transcript logs.
+
+A store is a directory of segments, each one a plain-text log slice named
+after the local time of its first entry (20251229-231329.txt), with a
+sidecar index (20251229-231329.idx) of fixed-size records:
+
+    <d epoch seconds><Q byte offset of the entry in the .txt>
+
+Only lines that start an entry ("[2025-12-29 23:13:29] ...") are indexed,
+so continuation and INFO LOOKUP lines stay with their entry. A new segment
+is started on the hour (ROTATE "hour") or when the current one passes
+max_bytes, always on an entry boundary. Closed segments can be gzipped
+(.txt.gz); their index keeps uncompressed offsets.
+
+Reading a time range bisects the segment names, then the index of each
+candidate segment, and reads only the bytes in between:
+
+    python transcript_store.py range obs_text/full_transcript_log \\
+        --from "2025-12-29 02:10" --to "2025-12-29 02:25"
+    python transcript_store.py import obs_text/full_transcript_log.txt \\
+        obs_text/full_transcript_log
+"""
+import argparse
+import bisect
+import gzip
+import os
+import re
+import shutil
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+INDEX_RECORD = struct.Struct("<dQ")
+SEGMENT_NAME_FORMAT = "%Y%m%d-%H%M%S"
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+_ENTRY_TS = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ")
+
+
+class Segment(NamedTuple):
+    start: float
+    name: str
+    txt: Path  # .txt or .txt.gz
+    idx: Path
+
+
+def _segment_start(name: str) -> float | None:
+    try:
+        return time.mktime(time.strptime(name.split(".", 1)[0][:15], SEGMENT_NAME_FORMAT))
+    except ValueError:
+        return None
+
+
+def _open_segment(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else path.open("rb")
+
+
+class _DirectAppender:
+    """Fallback appender (no group commit) for standalone use, e.g. import."""
+
+    def __init__(self):
+        self.handles: dict[Path, object] = {}
+
+    def append(self, path: Path, data) -> None:
+        f = self.handles.get(path)
+        if f is None:
+            f = self.handles[path] = path.open("ab")
+        f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def release(self, path: Path) -> None:
+        f = self.handles.pop(path, None)
+        if f is not None:
+            f.close()
+
+    def close(self) -> None:
+        for path in list(self.handles):
+            self.release(path)
+
+
+class TranscriptStore:
+    def __init__(
+        self,
+        root: Path,
+        appender=None,
+        rotate: str = "hour",
+        max_bytes: int = 8 * 1024 * 1024,
+        compress: bool = False,
+    ):
+        self.root = Path(root)
+        self.appender = appender
+        self.rotate = rotate
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.current: Segment | None = None
+        self.offset = 0
+        self.hour_key: tuple | None = None
+        self._resumed = False
+        self._compressor: threading.Thread | None = None
+        self._pending_compress: list[Segment] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ write
+    def _resume(self) -> None:
+        """Pick the newest segment back up after a restart (same hour, room left)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        segs = self.segments()
+        if self.compress:
+            stale = [s for s in segs if s.txt.suffix == ".txt"]
+            self._queue_compress(stale[:-1])
+        if not segs or segs[-1].txt.suffix != ".txt":
+            return
+        last = segs[-1]
+        size = last.txt.stat().st_size
+        key = time.localtime(last.start)[:4]
+        if size >= self.max_bytes or (self.rotate == "hour" and key != time.localtime()[:4]):
+            self._queue_compress([last])
+            return
+        if last.idx.exists():
+            extra = last.idx.stat().st_size % INDEX_RECORD.size
+            if extra:  # torn record from a crash
+                with last.idx.open("r+b") as f:
+                    f.truncate(last.idx.stat().st_size - extra)
+        self.current, self.offset, self.hour_key = last, size, key
+
+    def _roll(self, when: float) -> None:
+        if self.current is not None:
+            self.appender.release(self.current.txt)
+            self.appender.release(self.current.idx)
+            self._queue_compress([self.current])
+        name = time.strftime(SEGMENT_NAME_FORMAT, time.localtime(when))
+        n = 0
+        base = name
+        while (self.root / f"{name}.txt").exists() or (self.root / f"{name}.txt.gz").exists():
+            n += 1
+            name = f"{base}-{n}"
+        self.current = Segment(when, name, self.root / f"{name}.txt", self.root / f"{name}.idx")
+        self.offset = 0
+        self.hour_key = time.localtime(when)[:4]
+
+    def write(self, line: str, when: float, entry_start: bool = True) -> None:
+        """Append one line. Entry-start lines are indexed and may open a new segment."""
+        if self.appender is None:
+            self.appender = _DirectAppender()
+        if not self._resumed:
+            self._resumed = True
+            self._resume()
+        if entry_start or self.current is None:
+            if (
+                self.current is None
+                or self.offset >= self.max_bytes
+                or (self.rotate == "hour" and time.localtime(when)[:4] != self.hour_key)
+            ):
+                self._roll(when)
+        data = line.encode("utf-8")
+        self.appender.append(self.current.txt, data)
+        if entry_start:
+            self.appender.append(self.current.idx, INDEX_RECORD.pack(when, self.offset))
+        self.offset += len(data)
+
+    def close(self, compress_current: bool = False) -> None:
+        if self.current is not None and self.appender is not None:
+            self.appender.release(self.current.txt)
+            self.appender.release(self.current.idx)
+            if compress_current:
+                self._queue_compress([self.current])
+        if self._compressor is not None:
+            self._compressor.join()
+
+    def _queue_compress(self, segs: list[Segment]) -> None:
+        if not self.compress or not segs:
+            return
+        with self._lock:
+            self._pending_compress.extend(segs)
+            if self._compressor is None or not self._compressor.is_alive():
+                self._compressor = threading.Thread(
+                    target=self._compress_pending, name="segment-gzip", daemon=True
+                )
+                self._compressor.start()
+
+    def _compress_pending(self) -> None:
+        while True:
+            with self._lock:
+                if not self._pending_compress:
+                    return
+                seg = self._pending_compress.pop(0)
+            if seg.txt.suffix != ".txt" or not seg.txt.exists():
+                continue
+            gz = seg.txt.with_name(seg.txt.name + ".gz")
+            tmp = gz.with_name(gz.name + ".tmp")
+            with seg.txt.open("rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp, gz)
+            seg.txt.unlink()
+
+    # ------------------------------------------------------------------- read
+    def segments(self) -> list[Segment]:
+        out = []
+        if not self.root.is_dir():
+            return out
+        for idx in self.root.glob("*.idx"):
+            start = _segment_start(idx.stem)
+            if start is None:
+                continue
+            txt = idx.with_suffix(".txt")
+            if not txt.exists():
+                txt = idx.with_suffix(".txt.gz")
+                if not txt.exists():
+                    continue
+            out.append(Segment(start, idx.stem, txt, idx))
+        out.sort(key=lambda s: (s.start, s.name))
+        return out
+
+    @staticmethod
+    def _load_index(seg: Segment) -> tuple[list[float], list[int]]:
+        raw = seg.idx.read_bytes()
+        raw = raw[: len(raw) - len(raw) % INDEX_RECORD.size]
+        epochs, offsets = [], []
+        for epoch, offset in INDEX_RECORD.iter_unpack(raw):
+            epochs.append(epoch)
+            offsets.append(offset)
+        return epochs, offsets
+
+    def read_range(self, start: float, end: float) -> Iterator[str]:
+        """Yield the log lines of every entry stamped in [start, end]."""
+        segs = self.segments()
+        i = max(0, bisect.bisect_right([s.start for s in segs], start) - 1)
+        for seg in segs[i:]:
+            if seg.start > end:
+                break
+            epochs, offsets = self._load_index(seg)
+            lo = bisect.bisect_left(epochs, start)
+            hi = bisect.bisect_right(epochs, end)
+            if lo >= hi:
+                continue
+            with _open_segment(seg.txt) as f:
+                f.seek(offsets[lo])
+                data = f.read(offsets[hi] - offsets[lo]) if hi < len(offsets) else f.read()
+            yield from data.decode("utf-8", errors="replace").splitlines(keepends=True)
+
+    # ----------------------------------------------------------------- import
+    def import_flat_log(self, path: Path) -> int:
+        """Split an old single-file log into segments; returns entries written."""
+        entries = 0
+        when = None
+        with Path(path).open("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                m = _ENTRY_TS.match(line)
+                if m:
+                    when = time.mktime(time.strptime(m.group(1), TS_FORMAT))
+                    entries += 1
+                elif when is None:
+                    continue
+                self.write(line if line.endswith("\n") else line + "\n", when, entry_start=bool(m))
+        self.close(compress_current=True)
+        if isinstance(self.appender, _DirectAppender):
+            self.appender.close()
+        return entries
+
+
+def _parse_time(value: str) -> float:
+    for fmt in (TS_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, fmt))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"bad time {value!r} (want YYYY-MM-DD[ HH:MM[:SS]])")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Read or build segmented transcript logs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("range", help="print entries between two local times")
+    rp.add_argument("store", type=Path)
+    rp.add_argument("--from", dest="start", type=_parse_time, required=True)
+    rp.add_argument("--to", dest="end", type=_parse_time, default=None)
+    ip = sub.add_parser("import", help="split an old flat log into segments")
+    ip.add_argument("log", type=Path)
+    ip.add_argument("store", type=Path)
+    ip.add_argument("--gzip", action="store_true", help="compress the closed segments")
+    args = ap.parse_args()
+
+    if args.cmd == "range":
+        t0 = time.perf_counter()
+        end = args.end if args.end is not None else time.time()
+        n = 0
+        for line in TranscriptStore(args.store).read_range(args.start, end):
+            sys.stdout.write(line)
+            n += 1
+        print(f"-- {n} lines in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    else:
+        store = TranscriptStore(args.store, compress=args.gzip)
+        n = store.import_flat_log(args.log)
+        print(f"Imported {n} entries into {len(store.segments())} segments")
+
+
+if __name__ == "__main__":
+    main()